@@ -0,0 +1,368 @@
+"""
+LMU Recording Analysis
+
+Parallel per-lap aggregation of recorded sessions
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from math import prod
+from operator import add
+
+try:
+    from . import lmu_data
+    from .lmu_array import ctype_format, field_info, read_strided, strided_struct
+    from .lmu_record import RecordMapReader, RecordReader
+except ImportError:  # standalone, not package
+    import lmu_data
+    from lmu_array import ctype_format, field_info, read_strided, strided_struct
+    from lmu_record import RecordMapReader, RecordReader
+
+MAX_VEHICLES = lmu_data.LMUConstants.MAX_MAPPED_VEHICLES
+TELEM_STRIDE = ctypes.sizeof(lmu_data.LMUVehicleTelemetry)
+SCOR_STRIDE = ctypes.sizeof(lmu_data.LMUVehicleScoring)
+TELEM_OFFSET = field_info(lmu_data.LMUObjectOut, ("telemetry", "telemInfo"))[0]
+SCOR_OFFSET = field_info(lmu_data.LMUObjectOut, ("scoring", "vehScoringInfo"))[0]
+NUM_VEHICLES = struct.Struct("<i")
+NUM_VEHICLES_OFFSET = field_info(lmu_data.LMUObjectOut, ("scoring", "scoringInfo", "mNumVehicles"))[0]
+ACTIVE_VEHICLES = struct.Struct("<B")
+ACTIVE_VEHICLES_OFFSET = field_info(lmu_data.LMUObjectOut, ("telemetry", "activeVehicles"))[0]
+
+
+def _scor_field(name: str) -> int:
+    """Vehicle scoring field offset in LMUObjectOut"""
+    return SCOR_OFFSET + getattr(lmu_data.LMUVehicleScoring, name).offset
+
+
+def _telem_field(name: str) -> int:
+    """Vehicle telemetry field offset in LMUObjectOut"""
+    return TELEM_OFFSET + getattr(lmu_data.LMUVehicleTelemetry, name).offset
+
+
+# Vehicle scoring fields: offset, format
+SCOR_FIELDS = (
+    (_scor_field("mID"), "i"),
+    (_scor_field("mTotalLaps"), "h"),
+    (_scor_field("mLapStartET"), "d"),
+    (_scor_field("mLastSector1"), "d"),
+    (_scor_field("mLastSector2"), "d"),
+    (_scor_field("mLastLapTime"), "d"),
+    (_scor_field("mDriverName"), "32s"),
+)
+TELEM_ID = _telem_field("mID")
+TELEM_FUEL = _telem_field("mFuel")
+# Scoring region read by lap boundary scan
+SCAN_OFFSET = NUM_VEHICLES_OFFSET
+SCAN_SIZE = SCOR_OFFSET + SCOR_STRIDE * MAX_VEHICLES - SCAN_OFFSET
+
+
+class LapStats:
+    """Aggregated lap data of single vehicle
+
+    Channel stats are per channel element (ex. 4 values for wheel channel).
+    """
+
+    __slots__ = (
+        "slot_id",
+        "lap",
+        "driver",
+        "start_et",
+        "frames",
+        "fuel_start",
+        "fuel_end",
+        "sectors",
+        "channel_min",
+        "channel_max",
+        "channel_sum",
+        "_first_frame",
+        "_last_frame",
+        "_prev_frame",
+        "_prev_sectors",
+    )
+
+    def __init__(self, slot_id: int, lap: int, driver: str) -> None:
+        self.slot_id = slot_id
+        self.lap = lap
+        self.driver = driver
+        self.start_et = 0.0
+        self.frames = 0
+        self.fuel_start = 0.0
+        self.fuel_end = 0.0
+        self.sectors: tuple[float, float, float] | None = None
+        self.channel_min: dict[str, list[float]] = {}
+        self.channel_max: dict[str, list[float]] = {}
+        self.channel_sum: dict[str, list[float]] = {}
+        self._first_frame = -1
+        self._last_frame = -1
+        self._prev_frame = -1
+        self._prev_sectors: tuple[float, float, float] | None = None
+
+    @property
+    def fuel_used(self) -> float:
+        """Fuel used during lap (liters)"""
+        return self.fuel_start - self.fuel_end
+
+    def channel_mean(self, name: str) -> list[float]:
+        """Mean of channel"""
+        frames = self.frames
+        return [value / frames for value in self.channel_sum[name]] if frames else []
+
+    def merge(self, other: LapStats) -> None:
+        """Merge partial aggregate of same vehicle & lap"""
+        if other._first_frame < self._first_frame:
+            self.start_et = other.start_et
+            self.fuel_start = other.fuel_start
+            self._first_frame = other._first_frame
+        if other._last_frame > self._last_frame:
+            self.fuel_end = other.fuel_end
+            self._last_frame = other._last_frame
+        if other._prev_sectors is not None and (
+            self._prev_sectors is None or other._prev_frame < self._prev_frame
+        ):
+            self._prev_frame = other._prev_frame
+            self._prev_sectors = other._prev_sectors
+        self.frames += other.frames
+        for name, values in other.channel_min.items():
+            if name not in self.channel_min:
+                self.channel_min[name] = values
+                self.channel_max[name] = other.channel_max[name]
+                self.channel_sum[name] = other.channel_sum[name]
+                continue
+            self.channel_min[name] = list(map(min, self.channel_min[name], values))
+            self.channel_max[name] = list(map(max, self.channel_max[name], other.channel_max[name]))
+            self.channel_sum[name] = [
+                a + b for a, b in zip(self.channel_sum[name], other.channel_sum[name])]
+
+
+def channel_layout(name: str) -> tuple[int, str, tuple[tuple[int, int], ...], int]:
+    """Get layout of telemetry channel
+
+    Args:
+        name: LMUVehicleTelemetry field name, dot separated for nested field,
+            ex. "mEngineRPM", "mWheels.mTemperature".
+
+    Returns:
+        Offset of vehicle 0 field in LMUObjectOut, leaf struct format,
+        inner (count, stride) dimensions, number of values per vehicle.
+    """
+    offset = TELEM_OFFSET
+    ctype = lmu_data.LMUVehicleTelemetry
+    dims = []
+    for part in name.split("."):
+        field = getattr(ctype, part, None)
+        if field is None or not hasattr(field, "offset"):
+            raise AttributeError(f"{ctype.__name__} has no field '{part}'")
+        offset += field.offset
+        ctype = dict(ctype._fields_)[part]
+        if issubclass(ctype, ctypes.Array) and issubclass(ctype._type_, ctypes.Structure):
+            dims.append((ctype._length_, ctypes.sizeof(ctype._type_)))
+            ctype = ctype._type_
+    if issubclass(ctype, ctypes.Structure):
+        raise TypeError(f"channel is not numeric: {name}")
+    code, count = ctype_format(ctype)
+    if code in "sc":
+        raise TypeError(f"channel is not numeric: {name}")
+    leaf = f"{count}{code}" if count > 1 else code
+    return offset, leaf, tuple(dims), count * prod(count for count, _ in dims)
+
+
+def _scan_laps(filename: str, start: int, stop: int) -> list[tuple[int, int]]:
+    """Find frames where leader lap count changes
+
+    Returns:
+        List of (frame index, leader completed laps).
+    """
+    changes = []
+    last = None
+    buffer = bytearray(SCAN_SIZE)
+    laps_offset = _scor_field("mTotalLaps") - SCAN_OFFSET
+    with RecordMapReader(filename) as reader:
+        for index in range(start, min(stop, reader.frame_count)):
+            reader.read_region(index, SCAN_OFFSET, buffer)
+            count = min(max(NUM_VEHICLES.unpack_from(buffer)[0], 0), MAX_VEHICLES)
+            laps = read_strided(buffer, laps_offset, "h", count, SCOR_STRIDE)
+            leader = max(laps, default=0)
+            if leader != last:
+                changes.append((index, leader))
+                last = leader
+    return changes
+
+
+def _analyze_range(
+    filename: str, start: int, stop: int, channels: tuple[str, ...]
+) -> dict[tuple[int, int], LapStats]:
+    """Aggregate frames in range per vehicle & lap"""
+    layouts = [(name, *channel_layout(name)) for name in channels]
+    result: dict[tuple[int, int], LapStats] = {}
+    with RecordMapReader(filename) as reader:
+        for frame, data in enumerate(reader.frames(start, stop), start):
+            num_scor = min(max(NUM_VEHICLES.unpack_from(data, NUM_VEHICLES_OFFSET)[0], 0), MAX_VEHICLES)
+            num_telem = min(ACTIVE_VEHICLES.unpack_from(data, ACTIVE_VEHICLES_OFFSET)[0], MAX_VEHICLES)
+            (scor_id, scor_laps, scor_start, last_s1, last_s2, last_lap, scor_driver) = (
+                read_strided(data, offset, fmt, num_scor, SCOR_STRIDE)
+                for offset, fmt in SCOR_FIELDS
+            )
+            telem_index = {
+                slot_id: index for index, slot_id
+                in enumerate(read_strided(data, TELEM_ID, "i", num_telem, TELEM_STRIDE))
+            }
+            fuel = read_strided(data, TELEM_FUEL, "d", num_telem, TELEM_STRIDE)
+            channel_values = [
+                (strided_struct(leaf, ((num_telem, TELEM_STRIDE), *dims)).unpack_from(data, offset), size)
+                for _, offset, leaf, dims, size in layouts
+            ]
+            for index in range(num_scor):
+                slot_id = scor_id[index]
+                telem = telem_index.get(slot_id)
+                if telem is None:
+                    continue
+                key = (slot_id, scor_laps[index])
+                lap = result.get(key)
+                if lap is None:
+                    driver = scor_driver[index].split(b"\x00", 1)[0].decode(errors="replace")
+                    lap = result[key] = LapStats(slot_id, scor_laps[index], driver)
+                    lap.start_et = scor_start[index]
+                    lap.fuel_start = fuel[telem]
+                    lap._first_frame = frame
+                    lap._prev_frame = frame
+                    lap._prev_sectors = (last_s1[index], last_s2[index], last_lap[index])
+                    for (name, *_, size), (values, _) in zip(layouts, channel_values):
+                        row = values[telem * size:(telem + 1) * size]
+                        lap.channel_min[name] = list(row)
+                        lap.channel_max[name] = list(row)
+                        lap.channel_sum[name] = [0.0] * size
+                lap.frames += 1
+                lap.fuel_end = fuel[telem]
+                lap._last_frame = frame
+                # Update channel lists in place
+                for (values, size), mins, maxs, sums in zip(
+                    channel_values,
+                    lap.channel_min.values(),
+                    lap.channel_max.values(),
+                    lap.channel_sum.values(),
+                ):
+                    if size == 1:
+                        value = values[telem]
+                        if value < mins[0]:
+                            mins[0] = value
+                        elif value > maxs[0]:
+                            maxs[0] = value
+                        sums[0] += value
+                    else:
+                        row = values[telem * size:(telem + 1) * size]
+                        mins[:] = map(min, mins, row)
+                        maxs[:] = map(max, maxs, row)
+                        sums[:] = map(add, sums, row)
+    return result
+
+
+def _split_ranges(
+    boundaries: list[int], frame_count: int, chunk_frames: int
+) -> list[tuple[int, int]]:
+    """Split frame ranges at lap boundaries, limit range size to chunk_frames"""
+    ranges = []
+    edges = [*boundaries, frame_count]
+    for start, stop in zip(edges, edges[1:]):
+        while stop - start > chunk_frames:
+            ranges.append((start, start + chunk_frames))
+            start += chunk_frames
+        if stop > start:
+            ranges.append((start, stop))
+    return ranges
+
+
+def analyze_recording(
+    filename: str,
+    channels: tuple[str, ...] = ("mEngineRPM",),
+    max_workers: int | None = None,
+    chunk_frames: int = 2000,
+) -> dict[tuple[int, int], LapStats]:
+    """Aggregate recording per vehicle & lap in parallel
+
+    Recording is split at leader lap boundaries (scoring mTotalLaps),
+    each range is streamed from disk & aggregated by worker process,
+    partial results of laps spanning multiple ranges are merged.
+
+    Args:
+        filename: recording file path.
+        channels: telemetry channel names, see channel_layout().
+        max_workers: number of worker processes, default to CPU count, 0 = run in this process.
+        chunk_frames: max number of frames per task.
+
+    Returns:
+        Dict of (vehicle slot ID, completed laps) : LapStats.
+        Sector times (s1, s2, s3) are set when following lap is recorded.
+    """
+    for name in channels:
+        channel_layout(name)  # validate before spawning workers
+    with RecordReader(filename) as reader:
+        frame_count = reader.frame_count
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if max_workers:
+        workers = ProcessPoolExecutor(max_workers=max_workers)
+        submit = workers.submit
+    else:
+        workers = None
+        submit = _run_inline
+
+    try:
+        # Scan lap boundaries
+        step = max(chunk_frames * 4, -(-frame_count // max(max_workers, 1)))
+        scans = [
+            submit(_scan_laps, filename, start, start + step)
+            for start in range(0, frame_count, step)
+        ]
+        boundaries = []
+        last = None
+        for task in scans:
+            for frame, leader in task.result():
+                if leader != last:
+                    boundaries.append(frame)
+                    last = leader
+
+        # Aggregate & merge
+        tasks = [
+            submit(_analyze_range, filename, start, stop, tuple(channels))
+            for start, stop in _split_ranges(boundaries, frame_count, chunk_frames)
+        ]
+        result: dict[tuple[int, int], LapStats] = {}
+        for task in tasks:
+            for key, lap in task.result().items():
+                if key in result:
+                    result[key].merge(lap)
+                else:
+                    result[key] = lap
+    finally:
+        if workers is not None:
+            workers.shutdown()
+
+    for (slot_id, lap_number), lap in result.items():
+        following = result.get((slot_id, lap_number + 1))
+        if following is not None and following._prev_sectors is not None:
+            s1, s2, lap_time = following._prev_sectors
+            if s1 > 0 and s2 > 0 and lap_time > 0:
+                lap.sectors = (s1, s2 - s1, lap_time - s2)
+    return result
+
+
+class _Done:
+    """Completed inline task"""
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value) -> None:
+        self._value = value
+
+    def result(self):
+        return self._value
+
+
+def _run_inline(func, *args) -> _Done:
+    """Run task in this process"""
+    return _Done(func(*args))
@@ -0,0 +1,102 @@
+"""
+LMU Array Helper
+
+Strided bulk read of repeated fields from LMU shared memory buffer
+"""
+
+from __future__ import annotations
+
+import ctypes
+import struct
+from functools import lru_cache
+
+_LONG_FORMAT = {("l", 4): "i", ("l", 8): "q", ("L", 4): "I", ("L", 8): "Q"}
+
+
+def ctype_format(ctype: type) -> tuple[str, int]:
+    """Get struct format & number of elements of ctypes field type
+
+    Args:
+        ctype: ctypes simple type, or array of simple type.
+
+    Returns:
+        Struct format (standard size, no alignment), number of elements.
+    """
+    count = 1
+    while issubclass(ctype, ctypes.Array):
+        count *= ctype._length_
+        ctype = ctype._type_
+    code = ctype._type_
+    if not isinstance(code, str):
+        raise TypeError(f"unsupported field type: {ctype.__name__}")
+    if code in "lL":  # platform dependent long size
+        code = _LONG_FORMAT[code, ctypes.sizeof(ctype)]
+    return code, count
+
+
+def field_info(struct_type: type, names: tuple[str, ...]) -> tuple[int, type]:
+    """Get byte offset & ctypes type of nested field
+
+    Array fields are stepped into element 0.
+
+    Args:
+        struct_type: ctypes structure type, ex. lmu_data.LMUObjectOut.
+        names: nested field names, ex. ("telemetry", "telemInfo", "mPos").
+
+    Returns:
+        Byte offset from start of struct_type, ctypes type of field.
+    """
+    offset = 0
+    ctype = struct_type
+    for name in names:
+        while issubclass(ctype, ctypes.Array):
+            ctype = ctype._type_
+        field = getattr(ctype, name, None)
+        if field is None or not hasattr(field, "offset"):
+            raise AttributeError(f"{ctype.__name__} has no field '{name}'")
+        offset += field.offset
+        ctype = dict(ctype._fields_)[name]
+    return offset, ctype
+
+
+@lru_cache(maxsize=256)
+def strided_struct(leaf_format: str, dims: tuple[tuple[int, int], ...]) -> struct.Struct:
+    """Create (cached) struct that bulk unpacks strided repeated field
+
+    Args:
+        leaf_format: struct format of single field, without byte order prefix, ex. "3d".
+        dims: (count, stride in bytes) of each repeated dimension, outermost first.
+
+    Returns:
+        Struct that unpacks all repeated fields in one call (flat, outermost-major).
+    """
+    pattern = leaf_format
+    size = struct.calcsize(f"<{leaf_format}")
+    for count, stride in reversed(dims):
+        if count <= 0:
+            return struct.Struct("<")
+        padding = stride - size
+        if padding < 0:
+            raise ValueError(f"stride {stride} smaller than element size {size}")
+        gap = f"{padding}x" if padding else ""
+        pattern = f"{pattern}{gap}" * (count - 1) + pattern
+        size = stride * (count - 1) + size
+    return struct.Struct(f"<{pattern}")
+
+
+def read_strided(
+    buffer, offset: int, leaf_format: str, count: int, stride: int
+) -> tuple:
+    """Read field from a number of consecutive struct elements
+
+    Args:
+        buffer: any object supporting buffer protocol (bytearray, mmap, ctypes structure).
+        offset: byte offset of field in element 0.
+        leaf_format: struct format of field.
+        count: number of elements.
+        stride: element size in bytes.
+
+    Returns:
+        Flat tuple of unpacked values.
+    """
+    return strided_struct(leaf_format, ((count, stride),)).unpack_from(buffer, offset)
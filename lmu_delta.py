@@ -0,0 +1,311 @@
+"""
+LMU Delta
+
+Lap distance resampled reference laps & live time delta of all vehicles
+"""
+
+from __future__ import annotations
+
+import ctypes
+from array import array
+from collections import OrderedDict
+from math import ceil
+
+try:
+    from . import lmu_data
+    from .lmu_array import field_info, read_strided
+except ImportError:  # standalone, not package
+    import lmu_data
+    from lmu_array import field_info, read_strided
+
+MAX_VEHICLES = lmu_data.LMUConstants.MAX_MAPPED_VEHICLES
+SCOR_STRIDE = ctypes.sizeof(lmu_data.LMUVehicleScoring)
+
+
+def _scor_field(name: str) -> int:
+    """Vehicle scoring field offset in LMUObjectOut"""
+    return field_info(lmu_data.LMUObjectOut, ("scoring", "vehScoringInfo", name))[0]
+
+
+SCOR_ID = _scor_field("mID")
+SCOR_LAPS = _scor_field("mTotalLaps")
+SCOR_LAP_DIST = _scor_field("mLapDist")
+SCOR_LAP_START = _scor_field("mLapStartET")
+SCOR_DRIVER = _scor_field("mDriverName")
+SCOR_VEHICLE = _scor_field("mVehicleName")
+# Lap is complete only if a sample within this fraction of track length from start is recorded
+LAP_START_FRACTION = 0.05
+
+
+def _decode(value: bytes) -> str:
+    """Decode null terminated string"""
+    return value.split(b"\x00", 1)[0].decode(errors="replace")
+
+
+class ReferenceLap:
+    """Reference lap resampled onto fixed lap distance grid
+
+    Time into lap is stored as float32 array, one value per grid step.
+    """
+
+    __slots__ = (
+        "track_length",
+        "step",
+        "lap_time",
+        "times",
+    )
+
+    def __init__(self, track_length: float, step: float, lap_time: float, times: array) -> None:
+        self.track_length = track_length
+        self.step = step
+        self.lap_time = lap_time
+        self.times = times
+
+    @classmethod
+    def from_samples(
+        cls,
+        distances: list[float],
+        times: list[float],
+        track_length: float,
+        lap_time: float,
+        step: float = 5.0,
+    ) -> ReferenceLap:
+        """Create reference lap from lap samples
+
+        Args:
+            distances: lap distance of samples (meters).
+            times: time into lap of samples (seconds).
+            track_length: track length (meters), ex. scoringInfo.mLapDist.
+            lap_time: lap time (seconds).
+            step: grid step (meters).
+
+        Returns:
+            ReferenceLap.
+        """
+        if track_length <= 0 or step <= 0:
+            raise ValueError("track_length & step must be positive")
+        # Skip leading samples left over from previous lap
+        start = 0
+        while start < len(distances) and distances[start] > track_length * 0.5:
+            start += 1
+        # Keep samples with increasing distance & time, pin lap start & end
+        sample_dist = [0.0]
+        sample_time = [0.0]
+        for dist, time in zip(distances[start:], times[start:]):
+            if sample_dist[-1] < dist < track_length and sample_time[-1] <= time < lap_time:
+                sample_dist.append(dist)
+                sample_time.append(time)
+        sample_dist.append(track_length)
+        sample_time.append(lap_time)
+
+        grid_size = ceil(track_length / step) + 1
+        resampled = array("f", bytes(4 * grid_size))
+        last = len(sample_dist) - 1
+        index = 0
+        for point in range(grid_size):
+            dist = min(point * step, track_length)
+            while index < last - 1 and sample_dist[index + 1] < dist:
+                index += 1
+            d0 = sample_dist[index]
+            t0 = sample_time[index]
+            span = sample_dist[index + 1] - d0
+            resampled[point] = t0 + (sample_time[index + 1] - t0) * (dist - d0) / span
+        return cls(track_length, step, lap_time, resampled)
+
+    def time_at(self, distance: float) -> float:
+        """Reference time into lap at lap distance"""
+        return self.times_at((distance,))[0]
+
+    def times_at(self, distances: list[float]) -> list[float]:
+        """Reference time into lap at each lap distance (interpolated)
+
+        Plain loop over distances (stdlib, no NumPy), grid lookup is O(1) per vehicle.
+        Final grid cell ends at track length, shorter than step if not a multiple.
+        """
+        times = self.times
+        step = self.step
+        track_length = self.track_length
+        last = len(times) - 1
+        result = []
+        for distance in distances:
+            distance = min(max(distance, 0.0), track_length)
+            index = min(int(distance / step), last - 1)
+            d0 = index * step
+            width = min(d0 + step, track_length) - d0
+            t0 = times[index]
+            result.append(t0 + (times[index + 1] - t0) * (distance - d0) / width)
+        return result
+
+    def deltas(self, distances: list[float], times: list[float]) -> list[float]:
+        """Time delta against reference lap (positive = slower)
+
+        Args:
+            distances: lap distance per vehicle (meters).
+            times: time into lap per vehicle (seconds).
+
+        Returns:
+            Time delta per vehicle (seconds).
+        """
+        return [
+            time - reference
+            for time, reference in zip(times, self.times_at(distances))
+        ]
+
+
+class ReferenceCache:
+    """LRU cache of reference laps, keyed by (track, vehicle, driver)"""
+
+    __slots__ = (
+        "_laps",
+        "_max_size",
+    )
+
+    def __init__(self, max_size: int = 64) -> None:
+        self._laps: OrderedDict[tuple[str, str, str], ReferenceLap] = OrderedDict()
+        self._max_size = max_size
+
+    def __len__(self) -> int:
+        return len(self._laps)
+
+    def __contains__(self, key: tuple[str, str, str]) -> bool:
+        return key in self._laps
+
+    def get(self, key: tuple[str, str, str]) -> ReferenceLap | None:
+        """Get reference lap, mark as recently used"""
+        lap = self._laps.get(key)
+        if lap is not None:
+            self._laps.move_to_end(key)
+        return lap
+
+    def put(self, key: tuple[str, str, str], lap: ReferenceLap) -> None:
+        """Add or replace reference lap, evict least recently used"""
+        self._laps[key] = lap
+        self._laps.move_to_end(key)
+        while len(self._laps) > self._max_size:
+            self._laps.popitem(last=False)
+
+    def offer(self, key: tuple[str, str, str], lap: ReferenceLap) -> bool:
+        """Store reference lap if faster than cached lap
+
+        Returns:
+            True if stored.
+        """
+        cached = self._laps.get(key)
+        if cached is not None and cached.lap_time <= lap.lap_time:
+            return False
+        self.put(key, lap)
+        return True
+
+
+class DeltaTracker:
+    """Live time delta of all vehicles
+
+    Records lap distance samples of each vehicle from scoring data,
+    completed laps are offered to reference cache as vehicle's own best lap.
+    Laps not observed from start (tracker started mid-lap, vehicle joined mid-lap)
+    or with driver/vehicle change during lap are not offered.
+    """
+
+    __slots__ = (
+        "cache",
+        "step",
+        "_samples",
+        "distances",
+        "times",
+        "slot_ids",
+        "keys",
+        "_names",
+    )
+
+    def __init__(self, cache: ReferenceCache | None = None, step: float = 5.0) -> None:
+        """Initialize tracker
+
+        Args:
+            cache: reference lap cache, default creates new cache.
+            step: reference lap grid step (meters).
+        """
+        self.cache = ReferenceCache() if cache is None else cache
+        self.step = step
+        # Slot ID: (completed laps, lap start time, distances, times, key or None if partial lap)
+        self._samples: dict[
+            int, tuple[int, float, list[float], list[float], tuple[str, str, str] | None]] = {}
+        self.distances: tuple[float, ...] = ()
+        self.times: list[float] = []
+        self.slot_ids: tuple[int, ...] = ()
+        self.keys: list[tuple[str, str, str]] = []
+        self._names: tuple[str, tuple[bytes, ...], tuple[bytes, ...]] = ("", (), ())
+
+    def update(self, data: ctypes.Structure) -> None:
+        """Read vehicle lap progress & record lap samples
+
+        Args:
+            data: LMUObjectOut data, ex. MMapControl.data.
+        """
+        info = data.scoring.scoringInfo
+        count = min(max(info.mNumVehicles, 0), MAX_VEHICLES)
+        now = info.mCurrentET
+        track_length = info.mLapDist
+        track = _decode(info.mTrackName)
+        slot_ids = read_strided(data, SCOR_ID, "i", count, SCOR_STRIDE)
+        laps = read_strided(data, SCOR_LAPS, "h", count, SCOR_STRIDE)
+        distances = read_strided(data, SCOR_LAP_DIST, "d", count, SCOR_STRIDE)
+        starts = read_strided(data, SCOR_LAP_START, "d", count, SCOR_STRIDE)
+        times = [now - start for start in starts]
+
+        # Rebuild keys on any vehicle, driver (driver swap) or track name change
+        names = (
+            track,
+            read_strided(data, SCOR_VEHICLE, "64s", count, SCOR_STRIDE),
+            read_strided(data, SCOR_DRIVER, "32s", count, SCOR_STRIDE),
+        )
+        if self._names != names:
+            self.keys = [
+                (track, _decode(vehicle), _decode(driver))
+                for vehicle, driver in zip(names[1], names[2])
+            ]
+            self._names = names
+
+        samples = self._samples
+        start_limit = track_length * LAP_START_FRACTION
+        for index, slot_id in enumerate(slot_ids):
+            record = samples.get(slot_id)
+            if record is None or record[0] != laps[index]:
+                key = None  # lap not observed from start
+                if record is not None and laps[index] == record[0] + 1 and track_length > 0:
+                    key = self.keys[index]
+                    lap_time = starts[index] - record[1]
+                    if (
+                        lap_time > 0
+                        and record[4] == key
+                        and record[2]
+                        and min(record[2]) <= start_limit
+                    ):
+                        self.cache.offer(key, ReferenceLap.from_samples(
+                            record[2], record[3], track_length, lap_time, self.step))
+                record = samples[slot_id] = (laps[index], starts[index], [], [], key)
+            record[2].append(distances[index])
+            record[3].append(times[index])
+        if len(samples) > count:  # drop vehicles that left
+            for slot_id in samples.keys() - set(slot_ids):
+                del samples[slot_id]
+
+        self.slot_ids = slot_ids
+        self.distances = distances
+        self.times = times
+
+    def deltas(self, reference: ReferenceLap) -> list[float]:
+        """Time delta of all vehicles against reference lap"""
+        return reference.deltas(self.distances, self.times)
+
+    def deltas_multi(self, references: list[ReferenceLap]) -> list[list[float]]:
+        """Time delta of all vehicles against each reference lap"""
+        return [reference.deltas(self.distances, self.times) for reference in references]
+
+    def deltas_best(self) -> list[float | None]:
+        """Time delta of each vehicle against its own cached best lap"""
+        get = self.cache.get
+        result = []
+        for key, distance, time in zip(self.keys, self.distances, self.times):
+            reference = get(key)
+            result.append(None if reference is None else time - reference.time_at(distance))
+        return result
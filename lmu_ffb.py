@@ -0,0 +1,260 @@
+"""
+LMU FFB Sampler
+
+Low latency FFB torque sampling from LMUGeneric region only
+"""
+
+from __future__ import annotations
+
+import ctypes
+import mmap
+import multiprocessing
+import struct
+import threading
+from array import array
+from multiprocessing import shared_memory
+from statistics import median, pstdev
+from time import perf_counter_ns, sleep
+
+try:
+    from . import lmu_data
+    from .lmu_array import field_info
+    from .lmu_data import LMUConstants
+    from .lmu_mmap import logger
+except ImportError:  # standalone, not package
+    import lmu_data
+    from lmu_array import field_info
+    from lmu_data import LMUConstants
+    from lmu_mmap import logger
+
+GENERIC_SIZE = ctypes.sizeof(lmu_data.LMUGeneric)
+OBJECT_SIZE = ctypes.sizeof(lmu_data.LMUObjectOut)
+FFB_EVENT_OFFSET = field_info(lmu_data.LMUObjectOut, ("generic", "events", "SME_FFB"))[0]
+FFB_TORQUE_OFFSET = field_info(lmu_data.LMUObjectOut, ("generic", "FFBTorque"))[0]
+FFB_EVENT = struct.Struct("<I")
+FFB_TORQUE = struct.Struct("<f")
+MAX_TEAR_RETRY = 8
+
+
+class FFBSampler:
+    """FFB torque sampler
+
+    Reads only LMUGeneric region of shared memory, polls SME_FFB counter & FFBTorque,
+    stores timestamped samples in preallocated ring buffer.
+
+    Benchmark: run "python lmu_ffb.py" (see benchmark(), synthetic producer process
+    at 1000 Hz, 5000 updates, yield-only polling). Results depend heavily on free cores,
+    ex. 3 runs on single core Linux (producer & sampler share the core):
+        latency (producer write to sample): median 42-44 us, p99 3.8-4.8 ms
+        jitter (stdev of sample interval): 1.4-1.6 ms
+        captured: 3170-3670 of 5000 updates (rest coalesced)
+    """
+
+    __slots__ = (
+        "_mmap_name",
+        "_mmap_buffer",
+        "_buffer",
+        "_capacity",
+        "_thread",
+        "_stop",
+        "_last_event",
+        "_last_torque",
+        "timestamps",
+        "events",
+        "torques",
+        "count",
+        "torn",
+    )
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        mmap_name: str = LMUConstants.LMU_SHARED_MEMORY_FILE,
+    ) -> None:
+        """Initialize sampler
+
+        Args:
+            capacity: ring buffer size (number of samples).
+            mmap_name: mmap filename.
+        """
+        self._mmap_name = mmap_name
+        self._mmap_buffer = None
+        self._buffer = None
+        self._capacity = capacity
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._last_event = None
+        self._last_torque = None
+        self.timestamps = array("q", bytes(8 * capacity))  # perf_counter_ns
+        self.events = array("I", bytes(4 * capacity))  # SME_FFB counter
+        self.torques = array("f", bytes(4 * capacity))
+        self.count = 0  # total samples written
+        self.torn = 0  # reads retried due to concurrent write
+
+    def create(self, buffer=None) -> None:
+        """Map shared memory for LMUGeneric region sampling
+
+        Args:
+            buffer: optional buffer starting with LMUGeneric to sample from instead of mmap.
+        """
+        if buffer is None:
+            # Map full size, named mmap is created if game not running yet,
+            # game & other MMapControl would open undersized mapping otherwise.
+            # Only pages of LMUGeneric region are touched.
+            self._mmap_buffer = mmap.mmap(-1, OBJECT_SIZE, self._mmap_name)
+            buffer = self._mmap_buffer
+        self._buffer = buffer
+        logger.info("sharedmemory: ACTIVE: %s (FFB Sampler)", self._mmap_name)
+
+    def close(self) -> None:
+        """Stop sampling & close memory mapping"""
+        self.stop()
+        self._buffer = None
+        if self._mmap_buffer is not None:
+            self._mmap_buffer.close()
+            self._mmap_buffer = None
+            logger.info("sharedmemory: CLOSED: %s (FFB Sampler)", self._mmap_name)
+
+    def poll(self) -> bool:
+        """Read FFB torque once, store sample if changed
+
+        Returns:
+            True if new sample stored.
+        """
+        buffer = self._buffer
+        for _ in range(MAX_TEAR_RETRY):
+            event = FFB_EVENT.unpack_from(buffer, FFB_EVENT_OFFSET)[0]
+            torque = FFB_TORQUE.unpack_from(buffer, FFB_TORQUE_OFFSET)[0]
+            if event == FFB_EVENT.unpack_from(buffer, FFB_EVENT_OFFSET)[0]:
+                break
+            self.torn += 1
+        else:
+            return False
+        if event == self._last_event and torque == self._last_torque:
+            return False
+        self._last_event = event
+        self._last_torque = torque
+        index = self.count % self._capacity
+        self.timestamps[index] = perf_counter_ns()
+        self.events[index] = event
+        self.torques[index] = torque
+        self.count += 1
+        return True
+
+    def run(self, interval: float = 0.0) -> None:
+        """Poll until stopped
+
+        Args:
+            interval: sleep between polls (seconds), 0 = yield only.
+        """
+        poll = self.poll
+        wait = self._stop.is_set
+        while not wait():
+            poll()
+            sleep(interval)
+
+    def start(self, interval: float = 0.0) -> None:
+        """Start polling in background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, args=(interval,), name="lmu_ffb", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop background polling thread"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def latest(self) -> tuple[int, int, float] | None:
+        """Latest sample (timestamp ns, SME_FFB counter, torque), None if no sample"""
+        count = self.count
+        if not count:
+            return None
+        index = (count - 1) % self._capacity
+        return self.timestamps[index], self.events[index], self.torques[index]
+
+    def read(self, since: int) -> tuple[int, list[tuple[int, int, float]]]:
+        """Read samples written since sample count
+
+        Samples overwritten by ring buffer wrap are skipped.
+
+        Args:
+            since: sample count from previous read, 0 for all available.
+
+        Returns:
+            Current sample count, list of (timestamp ns, SME_FFB counter, torque).
+        """
+        count = self.count
+        start = max(since, count - self._capacity)
+        capacity = self._capacity
+        samples = [
+            (self.timestamps[index % capacity], self.events[index % capacity],
+             self.torques[index % capacity])
+            for index in range(start, count)
+        ]
+        return count, samples
+
+
+def _synthetic_producer(name: str, rate: float, total: int, result) -> None:
+    """Write FFB counter & torque at fixed rate, report write timestamps"""
+    shm = shared_memory.SharedMemory(name)
+    interval = int(1e9 / rate)
+    written = []
+    next_ns = perf_counter_ns()
+    for count in range(1, total + 1):
+        while perf_counter_ns() < next_ns:
+            pass
+        FFB_TORQUE.pack_into(shm.buf, FFB_TORQUE_OFFSET, (count % 200 - 100) / 100)
+        FFB_EVENT.pack_into(shm.buf, FFB_EVENT_OFFSET, count)
+        written.append(perf_counter_ns())
+        next_ns += interval
+    result.put(written)
+    shm.close()
+
+
+def benchmark(rate: float = 1000.0, total: int = 5000) -> dict[str, float]:
+    """Benchmark sampler latency & jitter against synthetic producer process
+
+    Args:
+        rate: producer FFB update rate (Hz).
+        total: number of producer updates.
+
+    Returns:
+        Latency median/p99 and interval jitter in microseconds.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=GENERIC_SIZE)
+    result = multiprocessing.Queue()
+    producer = multiprocessing.Process(
+        target=_synthetic_producer, args=(shm.name, rate, total, result))
+    sampler = FFBSampler(capacity=total * 2)
+    sampler.create(shm.buf)
+    sampler.start()
+    producer.start()
+    written = result.get()
+    producer.join()
+    sampler.stop()
+    _, samples = sampler.read(0)
+    sampler._buffer = None
+    shm.close()
+    shm.unlink()
+
+    latency = sorted(
+        (timestamp - written[event - 1]) / 1000
+        for timestamp, event, _ in samples if 0 < event <= total
+    )
+    intervals = [(b[0] - a[0]) / 1000 for a, b in zip(samples[1:], samples[2:])]
+    return {
+        "samples": len(samples),
+        "latency_median": median(latency),
+        "latency_p99": latency[int(len(latency) * 0.99)],
+        "jitter": pstdev(intervals),
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -10,13 +10,18 @@ import ctypes
 import logging
 import mmap
 import platform
+from time import perf_counter_ns
 
 try:
     from . import lmu_data
     from .lmu_data import LMUConstants
+    from .lmu_stats import MMapStats
+    from .lmu_trace import FrameInfo, FrameTracker
 except ImportError:  # standalone, not package
     import lmu_data
     from lmu_data import LMUConstants
+    from lmu_stats import MMapStats
+    from lmu_trace import FrameInfo, FrameTracker
 
 PLATFORM = platform.system()
 MAX_VEHICLES = LMUConstants.MAX_MAPPED_VEHICLES
@@ -41,34 +46,47 @@ class MMapControl:
         "_mmap_buffer",
         "_struct",
         "_buffer",
+        "_copy",
         "_realtime",
         "update",
         "data",
+        "stats",
     )
 
-    def __init__(self, mmap_name: str, data_struct: ctypes.Structure) -> None:
+    def __init__(
+        self,
+        mmap_name: str,
+        data_struct: ctypes.Structure,
+        stats: MMapStats | None = None,
+    ) -> None:
         """Initialize memory map setting
 
         Args:
             mmap_name: mmap filename.
             data_struct: ctypes data structure, ex. lmu_data.SharedMemoryEvent.
+            stats: optional update statistics, instrumentation is disabled if None.
         """
         self._mmap_name = mmap_name
         self._mmap_buffer = None
         self._struct = data_struct
-        self._buffer = bytearray()
+        # Copy buffer & view are allocated once, reused by create() & close()
+        self._buffer = bytearray(ctypes.sizeof(data_struct))
+        self._copy = data_struct.from_buffer(self._buffer)
         self._realtime = None
         self.update = None
         self.data = None
+        self.stats = stats
 
     def __del__(self):
         logger.info("sharedmemory: GC: MMap %s", self._mmap_name)
 
-    def create(self, access_mode: int = 0) -> None:
+    def create(self, access_mode: int = 0, copy: bool = True) -> None:
         """Create mmap instance & initial accessible copy
 
         Args:
             access_mode: 0 = copy access, 1 = direct access.
+            copy: copy mapped data into copy buffer (copy access only),
+                False keeps previous copy until next accepted update.
         """
         self._mmap_buffer = mmap.mmap(-1, ctypes.sizeof(self._struct), self._mmap_name)
 
@@ -76,20 +94,34 @@ class MMapControl:
             self.data = self._struct.from_buffer(self._mmap_buffer)
             self.update = self.__buffer_share
         else:
-            self._buffer[:] = self._mmap_buffer
+            if copy:
+                self._buffer[:] = self._mmap_buffer
             self._realtime = self._struct.from_buffer(self._mmap_buffer)
-            self.data = self._struct.from_buffer(self._buffer)
+            self.data = self._copy
             self.update = self.__buffer_copy
 
+        # Only LMUObjectOut carries frame timing for statistics
+        if self.stats is not None and self._struct is lmu_data.LMUObjectOut:
+            if access_mode:
+                self.update = self.__buffer_share_stats
+            else:
+                self.update = self.__buffer_copy_stats
+
         mode = "Direct" if access_mode else "Copy"
         logger.info("sharedmemory: ACTIVE: %s (%s Access)", self._mmap_name, mode)
 
-    def close(self) -> None:
+    def close(self, copy: bool = True) -> None:
         """Close memory mapping
 
         Create a final accessible mmap data copy before closing mmap instance.
+
+        Args:
+            copy: copy mapped data into copy buffer before closing,
+                False keeps previous copy (ex. last good data while game offline).
         """
-        self.data = self._struct.from_buffer_copy(self._mmap_buffer)
+        if copy:
+            self._buffer[:] = self._mmap_buffer
+        self.data = self._copy
         self._realtime = None
         try:
             self._mmap_buffer.close()
@@ -98,6 +130,30 @@ class MMapControl:
             logger.error("sharedmemory: buffer error while closing %s", self._mmap_name)
         self.update = None  # unassign update method (for proper garbage collection)
 
+    @property
+    def realtime(self) -> ctypes.Structure | None:
+        """Live data view over mapped memory (copy access only), None if not mapped"""
+        return self._realtime
+
+    @property
+    def copy(self) -> ctypes.Structure:
+        """Copy buffer data view, same object for lifetime of control"""
+        return self._copy
+
+    def reconnect(self) -> None:
+        """Re-map memory without touching copy buffer (copy access only)
+
+        Last copied data stays accessible until next accepted update.
+        """
+        self._realtime = None
+        try:
+            self._mmap_buffer.close()
+        except BufferError:
+            logger.error("sharedmemory: buffer error while closing %s", self._mmap_name)
+        self._mmap_buffer = mmap.mmap(-1, ctypes.sizeof(self._struct), self._mmap_name)
+        self._realtime = self._struct.from_buffer(self._mmap_buffer)
+        logger.info("sharedmemory: RECONNECTED: %s", self._mmap_name)
+
     def __buffer_share(self) -> None:
         """Share buffer access, may result data desync"""
 
@@ -113,6 +169,169 @@ class MMapControl:
         ):
             self._buffer[:] = self._mmap_buffer
 
+    def __buffer_share_stats(self) -> None:
+        """Share buffer access, with statistics"""
+        start = perf_counter_ns()
+        data = self.data
+        self.stats.record(
+            start,
+            0,
+            True,
+            data.telemetry.telemInfo[min(data.telemetry.playerVehicleIdx, MAX_VEHICLES - 1)].mElapsedTime,
+            data.scoring.scoringInfo.mCurrentET,
+        )
+
+    def __buffer_copy_stats(self) -> None:
+        """Copy buffer access, with statistics"""
+        start = perf_counter_ns()
+        # Same guard as __buffer_copy
+        accepted = bool(
+            (
+                self._realtime.generic.events.SME_UPDATE_SCORING
+                or self._realtime.generic.events.SME_UPDATE_TELEMETRY
+            ) and (
+                self._realtime.scoring.scoringInfo.mNumVehicles
+                == self._realtime.telemetry.activeVehicles
+            )
+        )
+        if accepted:
+            self._buffer[:] = self._mmap_buffer
+        data = self.data
+        self.stats.record(
+            start,
+            len(self._buffer) if accepted else 0,
+            accepted,
+            data.telemetry.telemInfo[min(data.telemetry.playerVehicleIdx, MAX_VEHICLES - 1)].mElapsedTime,
+            data.scoring.scoringInfo.mCurrentET,
+        )
+
+
+class MMapManager:
+    """Managed LMUObjectOut copy access with automatic reconnect
+
+    Watches game lifecycle (SME_STARTUP, SME_SHUTDOWN, SME_ENTER, gameVersion),
+    goes offline on shutdown or cleared game version, keeps serving last good data
+    while offline. Comes back online (re-maps memory, reusing copy buffer) on startup
+    or enter, shutdown flag cleared, game version change, or fresh frame while offline.
+    SME_EXIT (leaving session) alone does not stop copying.
+    Fresh frame detection time & game time are recorded in frame.
+    """
+
+    __slots__ = (
+        "_control",
+        "_tracker",
+        "_lifecycle",
+        "_version",
+        "_offline_time",
+        "online",
+        "reconnects",
+        "data",
+    )
+
+    def __init__(
+        self,
+        mmap_name: str = LMUConstants.LMU_SHARED_MEMORY_FILE,
+        stats: MMapStats | None = None,
+    ) -> None:
+        """Initialize managed memory map
+
+        Args:
+            mmap_name: mmap filename.
+            stats: optional update statistics.
+        """
+        self._control = MMapControl(mmap_name, lmu_data.LMUObjectOut, stats)
+        self._tracker = FrameTracker()
+        self._lifecycle = (0, 0, 0, 0)
+        self._version = 0
+        self._offline_time = (0.0, 0.0)  # live game time when went offline
+        self.online = False
+        self.reconnects = 0
+        self.data = self._control.copy  # same object for lifetime of manager
+
+    def create(self) -> None:
+        """Create mmap instance (copy access)
+
+        Previous data is kept until first update while online.
+        """
+        self._control.create(0, copy=False)
+        self._lifecycle, self._version = self.__read_lifecycle()
+        self._offline_time = self.__read_time()
+        self.online = bool(self._version)
+
+    def close(self) -> None:
+        """Close memory mapping, final copy is skipped while offline"""
+        self._control.close(copy=self.online)
+        self.online = False
+
+    @property
+    def stats(self) -> MMapStats | None:
+        """Update statistics"""
+        return self._control.stats
+
+    @property
+    def frame(self) -> FrameInfo:
+        """Latest fresh frame info"""
+        return self._tracker.frame
+
+    def update(self) -> bool:
+        """Check game lifecycle & update data copy while online
+
+        Returns:
+            True if fresh frame detected.
+        """
+        lifecycle, version = self.__read_lifecycle()
+        if lifecycle != self._lifecycle or version != self._version or not self.online:
+            self.__check_lifecycle(lifecycle, version)
+        if self.online:
+            self._control.update()
+            return self._tracker.check(self.data)
+        return False
+
+    def __read_lifecycle(self) -> tuple[tuple[int, int, int, int], int]:
+        """Read lifecycle events & game version from shared memory
+
+        Sub-struct views are not kept, so memory can be re-mapped.
+        """
+        generic = self._control.realtime.generic
+        events = generic.events
+        return (
+            events.SME_STARTUP, events.SME_SHUTDOWN, events.SME_ENTER, events.SME_EXIT
+        ), generic.gameVersion
+
+    def __read_time(self) -> tuple[float, float]:
+        """Read live player elapsed time & scoring time"""
+        realtime = self._control.realtime
+        telemetry = realtime.telemetry
+        return (
+            telemetry.telemInfo[min(telemetry.playerVehicleIdx, MAX_VEHICLES - 1)].mElapsedTime,
+            realtime.scoring.scoringInfo.mCurrentET,
+        )
+
+    def __check_lifecycle(self, lifecycle: tuple[int, int, int, int], version: int) -> None:
+        """Detect game shutdown & restart"""
+        startup, shutdown, enter, _ = lifecycle
+        last_startup, last_shutdown, last_enter, _ = self._lifecycle
+        went_down = not version or (shutdown and not last_shutdown)
+        came_up = version and (
+            version != self._version
+            or (startup and not last_startup)
+            or (enter and not last_enter)
+            or (last_shutdown and not shutdown)
+            or (not self.online and self.__read_time() != self._offline_time)
+        )
+        self._lifecycle = lifecycle
+        restarted = version and self._version and version != self._version
+        self._version = version
+        if went_down:
+            self._offline_time = self.__read_time()
+            if self.online:
+                self.online = False
+                logger.info("sharedmemory: OFFLINE: serving last data")
+        elif came_up and (not self.online or restarted):
+            self._control.reconnect()
+            self.reconnects += 1
+            self.online = True
+
 
 def test_api():
     """API test run"""
@@ -0,0 +1,238 @@
+"""
+LMU Query
+
+Compile field selector into strided bulk read over LMU data buffer
+
+Selector syntax (dot separated field path from root struct):
+    telemetry.telemInfo[*].mWheels[*].mTemperature
+    scoring.vehScoringInfo[:mNumVehicles].mLapDist
+    telemetry.telemInfo[0:4].mPos.x
+
+Index forms for array field: [*] all, [n] single, [a:b] range,
+[a:bound] range limited by count field ("mNumVehicles", "activeVehicles",
+or dotted path from root). Array of struct without index reads all elements.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import re
+import struct
+from array import array
+from typing import Iterable, Iterator
+
+try:
+    from . import lmu_data
+    from .lmu_array import ctype_format, field_info, strided_struct
+except ImportError:  # standalone, not package
+    import lmu_data
+    from lmu_array import ctype_format, field_info, strided_struct
+
+# Count field alias: field path from LMUObjectOut
+COUNT_ALIASES = {
+    "mNumVehicles": "scoring.scoringInfo.mNumVehicles",
+    "activeVehicles": "telemetry.activeVehicles",
+}
+# Struct format: array typecode
+ARRAY_TYPECODE = {
+    "b": "b", "B": "B", "?": "B", "h": "h", "H": "H", "i": "i", "I": "I",
+    "q": "q", "Q": "Q", "f": "f", "d": "d",
+}
+_SEGMENT = re.compile(r"^(\w+)(?:\[([^\]]*)\])?$")
+_SPLIT = re.compile(r"\.(?![^\[]*\])")  # dot outside brackets
+
+
+class _Dim:
+    """Repeated dimension"""
+
+    __slots__ = ("count", "stride", "bound")
+
+    def __init__(self, count: int, stride: int, bound: tuple[struct.Struct, int, int] | None) -> None:
+        self.count = count  # max count
+        self.stride = stride
+        self.bound = bound  # (count struct, count offset, start index) or None
+
+
+class Query:
+    """Compiled field selector
+
+    Call with any buffer holding root struct (MMapControl.data, bytearray, mmap)
+    to get values as dense flat array, outermost dimension first.
+    """
+
+    __slots__ = (
+        "selector",
+        "typecode",
+        "leaf_size",
+        "_offset",
+        "_leaf",
+        "_dims",
+        "_static",
+    )
+
+    def __init__(self, selector: str, root: type = lmu_data.LMUObjectOut) -> None:
+        """Compile selector
+
+        Args:
+            selector: field selector, see module docstring.
+            root: root ctypes structure type.
+        """
+        self.selector = selector
+        offset = 0
+        dims: list[_Dim] = []
+        ctype = root
+        for segment in _SPLIT.split(selector):
+            matched = _SEGMENT.match(segment.strip())
+            if not matched:
+                raise ValueError(f"invalid selector segment: {segment}")
+            name, spec = matched.groups()
+            if not issubclass(ctype, ctypes.Structure):
+                raise ValueError(f"cannot select '{name}' from {ctype.__name__}")
+            field = getattr(ctype, name, None)
+            if field is None or not hasattr(field, "offset"):
+                raise AttributeError(f"{ctype.__name__} has no field '{name}'")
+            offset += field.offset
+            ctype = dict(ctype._fields_)[name]
+            if not issubclass(ctype, ctypes.Array):
+                if spec is not None:
+                    raise ValueError(f"field '{name}' is not array")
+                continue
+            element = ctype._type_
+            if spec is None:
+                if not issubclass(element, ctypes.Structure):
+                    continue  # simple array read as whole leaf
+                spec = "*"
+            start, count, bound = _parse_index(spec, ctype._length_, root)
+            stride = ctypes.sizeof(element)
+            offset += start * stride
+            if count is not None:
+                dims.append(_Dim(count, stride, bound))
+            ctype = element
+
+        self._offset = offset
+        self._leaf, leaf_count, self.typecode = _leaf_format(ctype)
+        self.leaf_size = leaf_count
+        self._dims = tuple(dims)
+        self._static = (
+            strided_struct(self._leaf, tuple((dim.count, dim.stride) for dim in dims))
+            if not any(dim.bound for dim in dims) else None
+        )
+
+    def __repr__(self) -> str:
+        return f"Query({self.selector!r})"
+
+    def shape(self, buffer) -> tuple[int, ...]:
+        """Result shape of buffer, including leaf element count"""
+        return (*self._counts(buffer), self.leaf_size)
+
+    def __call__(self, buffer) -> array | tuple:
+        """Read selected values
+
+        Args:
+            buffer: root struct data.
+
+        Returns:
+            Flat array of values (tuple of bytes for char fields).
+        """
+        if self._static is not None:
+            values = self._static.unpack_from(buffer, self._offset)
+        else:
+            dims = tuple(zip(self._counts(buffer), (dim.stride for dim in self._dims)))
+            values = strided_struct(self._leaf, dims).unpack_from(buffer, self._offset)
+        if self.typecode is None:
+            return values
+        return array(self.typecode, values)
+
+    def stream(self, frames: Iterable) -> Iterator[array | tuple]:
+        """Read selected values from each frame, ex. RecordReader.frames()"""
+        for frame in frames:
+            yield self(frame)
+
+    def collect(self, frames: Iterable) -> array:
+        """Read selected values from all frames into single flat array
+
+        Frame values are concatenated, for dynamic bound selector
+        check shape() of each frame if frames differ in count.
+        """
+        if self.typecode is None:
+            raise TypeError("collect() requires numeric field")
+        result = array(self.typecode)
+        for frame in frames:
+            result.extend(self(frame))
+        return result
+
+    def _counts(self, buffer) -> list[int]:
+        """Count of each dimension"""
+        counts = []
+        for dim in self._dims:
+            if dim.bound is None:
+                counts.append(dim.count)
+            else:
+                count_struct, count_offset, start = dim.bound
+                value = count_struct.unpack_from(buffer, count_offset)[0]
+                counts.append(min(max(value - start, 0), dim.count))
+        return counts
+
+
+def compile_query(selector: str, root: type = lmu_data.LMUObjectOut) -> Query:
+    """Compile field selector, see Query"""
+    return Query(selector, root)
+
+
+def _parse_index(
+    spec: str, length: int, root: type
+) -> tuple[int, int | None, tuple[struct.Struct, int, int] | None]:
+    """Parse index spec
+
+    Returns:
+        Start index, count (None for single index), dynamic bound.
+    """
+    spec = spec.strip()
+    if spec == "*":
+        return 0, length, None
+    if ":" not in spec:
+        index = int(spec)
+        if not 0 <= index < length:
+            raise IndexError(f"index out of range: {index}")
+        return index, None, None
+    head, tail = (part.strip() for part in spec.split(":", 1))
+    start = int(head) if head else 0
+    if not 0 <= start <= length:
+        raise IndexError(f"index out of range: {start}")
+    if not tail:
+        return start, length - start, None
+    if tail.lstrip("-").isdigit():
+        stop = min(int(tail), length)
+        return start, max(stop - start, 0), None
+    path = COUNT_ALIASES.get(tail, tail)
+    count_offset, count_type = field_info(root, tuple(path.split(".")))
+    code, count = ctype_format(count_type)
+    if count != 1 or code not in "bBhHiIqQ":
+        raise TypeError(f"count field is not integer: {tail}")
+    return start, length - start, (struct.Struct(f"<{code}"), count_offset, start)
+
+
+def _leaf_format(ctype: type) -> tuple[str, int, str | None]:
+    """Get leaf struct format, element count, array typecode"""
+    if issubclass(ctype, ctypes.Structure):
+        # Struct of same simple type, ex. LMUVect3
+        codes = []
+        total = 0
+        pattern = ""
+        position = 0
+        for name, field_type in ctype._fields_:
+            field = getattr(ctype, name)
+            code, count = ctype_format(field_type)
+            if field.offset > position:
+                pattern += f"{field.offset - position}x"
+            pattern += f"{count}{code}"
+            codes.append(code)
+            total += count
+            position = field.offset + ctypes.sizeof(field_type)
+        if len(set(codes)) != 1 or codes[0] not in ARRAY_TYPECODE:
+            raise TypeError(f"struct leaf must contain single numeric type: {ctype.__name__}")
+        return pattern, total, ARRAY_TYPECODE[codes[0]]
+    code, count = ctype_format(ctype)
+    if code == "c":  # char array as bytes
+        return f"{count}s", 1, None
+    return (f"{count}{code}" if count > 1 else code), count, ARRAY_TYPECODE.get(code)
@@ -0,0 +1,376 @@
+"""
+LMU Recording
+
+Record & replay data frames to file
+
+Recording layout (version 2):
+    header (RECORD_HEADER + RECORD_STRIDE), zero padded to page size
+    frames, each zero padded to frame stride (frame size rounded up to page size)
+
+Each frame starts on page boundary, so mapped reader touches only pages of frames
+(or frame regions) it reads. Version 1 recordings (packed frames) are still readable.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import mmap
+import os
+import struct
+from typing import Iterator
+
+try:
+    from . import lmu_data
+except ImportError:  # standalone, not package
+    import lmu_data
+
+RECORD_MAGIC = b"LMUREC"
+RECORD_VERSION = 2
+# Header: magic, version, frame size, header size
+RECORD_HEADER = struct.Struct("<6sHII")
+# Header (version 2+): frame stride
+RECORD_STRIDE = struct.Struct("<I")
+PAGE_SIZE = mmap.PAGESIZE
+
+
+def _page_align(size: int) -> int:
+    """Round size up to page size"""
+    return -(-size // PAGE_SIZE) * PAGE_SIZE
+
+
+def _read_header(file, filename: str, data_struct: type) -> tuple[int, int, int]:
+    """Read & validate recording header
+
+    Returns:
+        Frame size, header size, frame stride.
+    """
+    header = file.read(RECORD_HEADER.size + RECORD_STRIDE.size)
+    if len(header) < RECORD_HEADER.size:
+        raise ValueError(f"not a recording file: {filename}")
+    magic, version, frame_size, header_size = RECORD_HEADER.unpack_from(header)
+    if magic != RECORD_MAGIC or version > RECORD_VERSION:
+        raise ValueError(f"unsupported recording file: {filename}")
+    if frame_size != ctypes.sizeof(data_struct):
+        raise ValueError(
+            f"frame size mismatch: {frame_size} != {ctypes.sizeof(data_struct)}")
+    if version < 2:
+        return frame_size, header_size, frame_size
+    if len(header) < RECORD_HEADER.size + RECORD_STRIDE.size:
+        raise ValueError(f"truncated recording header: {filename}")
+    return frame_size, header_size, RECORD_STRIDE.unpack_from(header, RECORD_HEADER.size)[0]
+
+
+class RecordWriter:
+    """Write data frames to recording file"""
+
+    __slots__ = (
+        "_file",
+        "_padding",
+        "frame_count",
+    )
+
+    def __init__(self, filename: str, data_struct: type = lmu_data.LMUObjectOut) -> None:
+        """Create recording file
+
+        Args:
+            filename: recording file path.
+            data_struct: ctypes data structure of frame.
+        """
+        frame_size = ctypes.sizeof(data_struct)
+        header_size = _page_align(RECORD_HEADER.size + RECORD_STRIDE.size)
+        frame_stride = _page_align(frame_size)
+        self._padding = bytes(frame_stride - frame_size)
+        self._file = open(filename, "wb")
+        header = RECORD_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, frame_size, header_size)
+        header += RECORD_STRIDE.pack(frame_stride)
+        self._file.write(header.ljust(header_size, b"\x00"))
+        self.frame_count = 0
+
+    def __enter__(self) -> RecordWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, data: ctypes.Structure) -> None:
+        """Append data frame, ex. MMapControl.data"""
+        self._file.write(data)
+        if self._padding:
+            self._file.write(self._padding)
+        self.frame_count += 1
+
+    def close(self) -> None:
+        """Close recording file"""
+        self._file.close()
+
+
+class RecordReader:
+    """Read data frames from recording file
+
+    Frames are streamed into a reused buffer, not loaded into memory at once.
+    """
+
+    __slots__ = (
+        "_file",
+        "_struct",
+        "_header_size",
+        "_buffer",
+        "frame_size",
+        "frame_stride",
+        "frame_count",
+        "data",
+    )
+
+    def __init__(self, filename: str, data_struct: type = lmu_data.LMUObjectOut) -> None:
+        """Open recording file
+
+        Args:
+            filename: recording file path.
+            data_struct: ctypes data structure of frame.
+        """
+        self._file = open(filename, "rb")
+        try:
+            frame_size, header_size, frame_stride = _read_header(self._file, filename, data_struct)
+        except ValueError:
+            self._file.close()
+            raise
+        self._struct = data_struct
+        self._header_size = header_size
+        self._buffer = bytearray(frame_size)
+        self.frame_size = frame_size
+        self.frame_stride = frame_stride
+        self.frame_count = _frame_count(
+            os.fstat(self._file.fileno()).st_size, header_size, frame_size, frame_stride)
+        self.data = data_struct.from_buffer(self._buffer)
+
+    def __enter__(self) -> RecordReader:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def read(self, index: int) -> ctypes.Structure:
+        """Read frame into reused buffer
+
+        Args:
+            index: frame index.
+
+        Returns:
+            Data view over reused buffer, overwritten by next read.
+        """
+        if not 0 <= index < self.frame_count:
+            raise IndexError(f"frame index out of range: {index}")
+        self._file.seek(self._header_size + index * self.frame_stride)
+        self._file.readinto(self._buffer)
+        return self.data
+
+    def read_region(self, index: int, offset: int, buffer: bytearray) -> bytearray:
+        """Read part of frame into buffer
+
+        Args:
+            index: frame index.
+            offset: byte offset in frame.
+            buffer: destination buffer, read size is buffer size.
+
+        Returns:
+            Buffer.
+        """
+        self._file.seek(self._header_size + index * self.frame_stride + offset)
+        self._file.readinto(buffer)
+        return buffer
+
+    def frames(self, start: int = 0, stop: int | None = None) -> Iterator[ctypes.Structure]:
+        """Iterate frames in range
+
+        Args:
+            start: first frame index.
+            stop: stop frame index (exclusive), default to end.
+
+        Yields:
+            Data view over reused buffer, overwritten by next frame.
+        """
+        if stop is None or stop > self.frame_count:
+            stop = self.frame_count
+        if start >= stop:
+            return
+        readinto = self._file.readinto
+        seek = self._file.seek
+        buffer = self._buffer
+        position = self._header_size + start * self.frame_stride
+        stride = self.frame_stride
+        for _ in range(start, stop):
+            seek(position)
+            readinto(buffer)
+            position += stride
+            yield self.data
+
+    def close(self) -> None:
+        """Close recording file"""
+        self._file.close()
+
+
+class RecordMapReader:
+    """Memory mapped recording reader
+
+    Frames are returned as data views directly over mapped file pages (copy on write),
+    no frame is read or copied until its pages are accessed.
+
+    File is mapped in windows of frames: copy on write mapping reserves commit charge
+    for whole mapped view on Windows, mapping multi-GB file at once may fail or
+    exhaust commit limit. Views stay valid after window moves (old window is unmapped
+    when last view is deleted), drop all views before close() to unmap immediately.
+    """
+
+    __slots__ = (
+        "_file",
+        "_mmap",
+        "_struct",
+        "_header_size",
+        "_file_size",
+        "_window",
+        "_window_start",
+        "_window_stop",
+        "_window_offset",
+        "frame_size",
+        "frame_stride",
+        "frame_count",
+    )
+
+    def __init__(
+        self,
+        filename: str,
+        data_struct: type = lmu_data.LMUObjectOut,
+        window: int = 256,
+    ) -> None:
+        """Open recording file
+
+        Args:
+            filename: recording file path.
+            data_struct: ctypes data structure of frame.
+            window: number of frames per mapped window, 0 = map whole file.
+        """
+        self._file = open(filename, "rb")
+        try:
+            frame_size, header_size, frame_stride = _read_header(self._file, filename, data_struct)
+        except ValueError:
+            self._file.close()
+            raise
+        self._mmap = None
+        self._struct = data_struct
+        self._header_size = header_size
+        self._file_size = os.fstat(self._file.fileno()).st_size
+        self.frame_size = frame_size
+        self.frame_stride = frame_stride
+        self.frame_count = _frame_count(self._file_size, header_size, frame_size, frame_stride)
+        self._window = window if window > 0 else max(self.frame_count, 1)
+        self._window_start = 0
+        self._window_stop = 0  # empty window
+        self._window_offset = 0
+
+    def __enter__(self) -> RecordMapReader:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def read(self, index: int) -> ctypes.Structure:
+        """Get frame view
+
+        Args:
+            index: frame index.
+
+        Returns:
+            Data view over mapped file pages.
+        """
+        if not 0 <= index < self.frame_count:
+            raise IndexError(f"frame index out of range: {index}")
+        position = self._position(index)
+        return self._struct.from_buffer(self._mmap, position)
+
+    def read_region(self, index: int, offset: int, buffer: bytearray) -> bytearray:
+        """Copy part of frame into buffer, touches only pages of region
+
+        Args:
+            index: frame index.
+            offset: byte offset in frame.
+            buffer: destination buffer, read size is buffer size.
+
+        Returns:
+            Buffer.
+        """
+        if not 0 <= index < self.frame_count:
+            raise IndexError(f"frame index out of range: {index}")
+        position = self._position(index) + offset
+        buffer[:] = self._mmap[position:position + len(buffer)]
+        return buffer
+
+    def frames(self, start: int = 0, stop: int | None = None) -> Iterator[ctypes.Structure]:
+        """Iterate frames in range
+
+        Args:
+            start: first frame index.
+            stop: stop frame index (exclusive), default to end.
+
+        Yields:
+            Data view over mapped file pages.
+        """
+        if stop is None or stop > self.frame_count:
+            stop = self.frame_count
+        from_buffer = self._struct.from_buffer
+        stride = self.frame_stride
+        index = max(start, 0)
+        while index < stop:
+            position = self._position(index)
+            buffer = self._mmap
+            for _ in range(index, min(stop, self._window_stop)):
+                yield from_buffer(buffer, position)
+                position += stride
+            index = self._window_stop
+
+    def close(self) -> None:
+        """Unmap & close recording file
+
+        If frame views are still alive, mapping is released when last view is deleted.
+        """
+        self._unmap()
+        self._file.close()
+
+    def _position(self, index: int) -> int:
+        """Map window containing frame if needed, get frame position in window"""
+        if not self._window_start <= index < self._window_stop:
+            self._unmap()
+            stride = self.frame_stride
+            start = index - index % self._window
+            stop = min(start + self._window, self.frame_count)
+            offset = self._header_size + start * stride
+            offset -= offset % mmap.ALLOCATIONGRANULARITY
+            end = min(self._header_size + stop * stride, self._file_size)
+            self._mmap = mmap.mmap(
+                self._file.fileno(), end - offset, access=mmap.ACCESS_COPY, offset=offset)
+            self._window_start = start
+            self._window_stop = stop
+            self._window_offset = offset
+        return self._header_size + index * self.frame_stride - self._window_offset
+
+    def _unmap(self) -> None:
+        """Unmap current window"""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # unmapped when last view deleted
+            self._mmap = None
+        self._window_stop = 0
+
+
+def _frame_count(file_size: int, header_size: int, frame_size: int, frame_stride: int) -> int:
+    """Number of complete frames, last frame may lack padding"""
+    if file_size < header_size + frame_size:
+        return 0
+    return (file_size - header_size - frame_size) // frame_stride + 1
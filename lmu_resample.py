@@ -0,0 +1,207 @@
+"""
+LMU Resample
+
+Stream irregular telemetry frames into fixed rate samples
+"""
+
+from __future__ import annotations
+
+from array import array
+from math import ceil
+from typing import Iterable, Iterator
+
+try:
+    from .lmu_query import Query
+except ImportError:  # standalone, not package
+    from lmu_query import Query
+
+
+class ResampledChunk:
+    """Fixed rate samples
+
+    Values of each channel are flat, width values per sample,
+    widths are fixed within chunk.
+    """
+
+    __slots__ = (
+        "times",
+        "values",
+        "widths",
+    )
+
+    def __init__(self, times: array, values: dict[str, array], widths: dict[str, int]) -> None:
+        self.times = times
+        self.values = values
+        self.widths = widths
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+
+class Resampler:
+    """Fixed rate resampler
+
+    Frames are buffered, then linearly interpolated over elapsed time in chunks,
+    output sample time is aligned to multiples of 1 / rate.
+    Duplicate frames (same time, ex. skipped copy update) are ignored,
+    time going backwards (session restart) or channel width change
+    (dynamic vehicle count) flushes & restarts stream,
+    gaps longer than max_gap are not interpolated.
+    """
+
+    __slots__ = (
+        "rate",
+        "max_gap",
+        "_chunk_size",
+        "_time_query",
+        "_queries",
+        "_widths",
+        "_times",
+        "_values",
+        "_next_index",
+    )
+
+    def __init__(
+        self,
+        channels: Iterable[str],
+        rate: float,
+        time_selector: str = "telemetry.telemInfo[0].mElapsedTime",
+        chunk_size: int = 256,
+        max_gap: float = 0.5,
+    ) -> None:
+        """Initialize resampler
+
+        Args:
+            channels: numeric field selectors, see lmu_query,
+                ex. "telemetry.telemInfo[0].mEngineRPM".
+            rate: output sample rate (Hz).
+            time_selector: field selector of frame time (seconds).
+            chunk_size: number of buffered frames per interpolation chunk.
+            max_gap: max time between frames to interpolate (seconds).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.max_gap = max_gap
+        self._chunk_size = max(chunk_size, 2)
+        self._time_query = Query(time_selector)
+        self._queries = {name: Query(name) for name in channels}
+        for name, query in self._queries.items():
+            if query.typecode is None:
+                raise TypeError(f"channel is not numeric: {name}")
+        self._widths: dict[str, int] = {}
+        self._times = array("d")
+        self._values: dict[str, array] = {name: array("d") for name in self._queries}
+        self._next_index: int | None = None
+
+    def push(self, data) -> ResampledChunk | None:
+        """Add frame
+
+        Args:
+            data: LMUObjectOut data, ex. MMapControl.data or RecordReader frame.
+
+        Returns:
+            Resampled chunk when chunk_size frames buffered, otherwise None.
+        """
+        time = self._time_query(data)[0]
+        times = self._times
+        if times and time == times[-1]:
+            return None
+        rows = {name: query(data) for name, query in self._queries.items()}
+        widths = self._widths
+        result = None
+        if times and (
+            time < times[-1]  # restarted
+            or any(len(row) != widths[name] for name, row in rows.items())  # count changed
+        ):
+            result = self.flush()
+            self._reset()
+        times.append(time)
+        for name, row in rows.items():
+            widths.setdefault(name, len(row))
+            self._values[name].fromlist(row.tolist())
+        if len(times) >= self._chunk_size:
+            return self.flush() if result is None else result
+        return result
+
+    def flush(self) -> ResampledChunk | None:
+        """Resample buffered frames, keep last frame for next chunk
+
+        Returns:
+            Resampled chunk, None if no sample produced.
+        """
+        times = self._times
+        if not times:
+            return None
+        rate = self.rate
+        if self._next_index is None:
+            self._next_index = ceil(times[0] * rate)
+        index = self._next_index
+        last_time = times[-1]
+        max_gap = self.max_gap
+        widths = self._widths
+        sources = self._values
+        out_times = array("d")
+        out_values = {name: array("d") for name in sources}
+
+        segment = 0
+        last_segment = len(times) - 1
+        while True:
+            time = index / rate
+            if time > last_time:
+                break
+            while segment < last_segment - 1 and times[segment + 1] < time:
+                segment += 1
+            t0 = times[segment]
+            if segment == last_segment:  # single frame
+                t1 = t0
+            else:
+                t1 = times[segment + 1]
+            span = t1 - t0
+            if span > max_gap and time > t0:  # skip gap, continue from next frame
+                segment += 1
+                index = max(ceil(t1 * rate), index + 1)
+                continue
+            fraction = (time - t0) / span if span > 0 else 0.0
+            out_times.append(time)
+            for name, source in sources.items():
+                width = widths[name]
+                start = segment * width
+                row0 = source[start:start + width]
+                if span > 0:
+                    row1 = source[start + width:start + width * 2]
+                    out_values[name].extend(a + (b - a) * fraction for a, b in zip(row0, row1))
+                else:
+                    out_values[name].extend(row0)
+            index += 1
+        self._next_index = index
+
+        # Keep last frame to interpolate across chunk boundary
+        del times[:-1]
+        for name, source in sources.items():
+            del source[:-widths[name] or len(source)]
+        if not out_times:
+            return None
+        return ResampledChunk(out_times, out_values, dict(widths))
+
+    def run(self, frames: Iterable) -> Iterator[ResampledChunk]:
+        """Resample frames, ex. RecordReader.frames()
+
+        Yields:
+            Resampled chunks, including final partial chunk.
+        """
+        for frame in frames:
+            chunk = self.push(frame)
+            if chunk is not None:
+                yield chunk
+        chunk = self.flush()
+        if chunk is not None:
+            yield chunk
+
+    def _reset(self) -> None:
+        """Clear buffered frames, channel widths & output time"""
+        self._widths.clear()
+        del self._times[:]
+        for source in self._values.values():
+            del source[:]
+        self._next_index = None
@@ -0,0 +1,272 @@
+"""
+LMU Update Scheduler
+
+Share single MMapControl update between multiple consumers,
+dispatch only to consumers whose data sections changed.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter_ns
+from typing import Any, Callable
+
+try:
+    from .lmu_mmap import MAX_VEHICLES, MMapControl, logger
+    from .lmu_snapshot import Snapshot, SnapshotPool
+    from .lmu_trace import FrameInfo, FrameTracker
+except ImportError:  # standalone, not package
+    from lmu_mmap import MAX_VEHICLES, MMapControl, logger
+    from lmu_snapshot import Snapshot, SnapshotPool
+    from lmu_trace import FrameInfo, FrameTracker
+
+
+def _generic_key(data) -> bytes:
+    """Events, game version, FFB torque"""
+    return bytes(data.generic)
+
+
+def _paths_key(data) -> bytes:
+    """Path strings"""
+    return bytes(data.paths)
+
+
+def _scoring_key(data) -> tuple:
+    """Scoring time & number of vehicles"""
+    info = data.scoring.scoringInfo
+    return info.mCurrentET, info.mNumVehicles
+
+
+def _telemetry_key(data) -> tuple:
+    """Player telemetry time & number of vehicles"""
+    telemetry = data.telemetry
+    index = min(telemetry.playerVehicleIdx, MAX_VEHICLES - 1)
+    return telemetry.telemInfo[index].mElapsedTime, telemetry.activeVehicles
+
+
+_UNSET = object()
+
+# Section name: change key function, add custom section before register()
+SECTION_KEYS: dict[str, Callable[[ctypes.Structure], Any]] = {
+    "generic": _generic_key,
+    "paths": _paths_key,
+    "scoring": _scoring_key,
+    "telemetry": _telemetry_key,
+}
+
+
+class Consumer:
+    """Registered consumer"""
+
+    __slots__ = (
+        "callback",
+        "sections",
+        "interval",
+        "threaded",
+        "seen",
+        "last_ns",
+        "pending",
+    )
+
+    def __init__(
+        self,
+        callback: Callable[[ctypes.Structure], Any],
+        sections: tuple[str, ...],
+        interval: int,
+        threaded: bool,
+    ) -> None:
+        self.callback = callback
+        self.sections = sections
+        self.interval = interval
+        self.threaded = threaded
+        self.seen = None
+        self.last_ns = 0
+        self.pending: Future | None = None
+
+
+class MMapScheduler:
+    """Multi-rate consumer scheduler
+
+    Each tick runs one MMapControl update, then dispatches data to consumers
+    whose registered sections changed, limited by consumer max rate.
+    Threaded consumers get leased snapshot data (captured once per tick),
+    not overwritten by following updates while consumer is running.
+    Snapshots carry frame info of tick (Snapshot.frame), see frame.
+    """
+
+    __slots__ = (
+        "_mmap",
+        "_consumers",
+        "_section_keys",
+        "_section_last",
+        "_section_version",
+        "_executor",
+        "_max_workers",
+        "_snapshots",
+        "_tracker",
+    )
+
+    def __init__(self, mmap_control: MMapControl, max_workers: int = 4) -> None:
+        """Initialize scheduler
+
+        Args:
+            mmap_control: created MMapControl instance with LMUObjectOut data.
+            max_workers: max thread pool workers for threaded consumers.
+        """
+        self._mmap = mmap_control
+        self._consumers: list[Consumer] = []
+        self._section_keys: dict[str, Callable[[ctypes.Structure], Any]] = {}
+        self._section_last: dict[str, Any] = {}
+        self._section_version: dict[str, int] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._max_workers = max_workers
+        self._snapshots: SnapshotPool | None = None
+        self._tracker = FrameTracker()
+
+    def register(
+        self,
+        callback: Callable[[ctypes.Structure], Any],
+        sections: tuple[str, ...] = ("telemetry",),
+        max_rate: float = 0.0,
+        threaded: bool = False,
+    ) -> Consumer:
+        """Register consumer
+
+        Args:
+            callback: function called with MMapControl.data when sections changed,
+                threaded callback is called with snapshot copy of data.
+            sections: section names from SECTION_KEYS that consumer reads.
+            max_rate: max dispatch rate (Hz), 0 = every change.
+            threaded: run callback in thread pool, skipped while previous call is running.
+
+        Returns:
+            Consumer handle for unregister().
+        """
+        for name in sections:
+            if name not in SECTION_KEYS:
+                raise KeyError(f"unknown section: {name}")
+            if name not in self._section_keys:
+                self._section_keys[name] = SECTION_KEYS[name]
+                self._section_version[name] = 0
+        interval = int(1e9 / max_rate) if max_rate > 0 else 0
+        consumer = Consumer(callback, tuple(sections), interval, threaded)
+        self._consumers.append(consumer)
+        if threaded:
+            self._snapshots = None  # resize pool on next threaded dispatch
+        return consumer
+
+    def unregister(self, consumer: Consumer) -> None:
+        """Unregister consumer"""
+        self._consumers.remove(consumer)
+        used = {name for item in self._consumers for name in item.sections}
+        for name in tuple(self._section_keys):
+            if name not in used:
+                del self._section_keys[name]
+                del self._section_version[name]
+                self._section_last.pop(name, None)
+
+    def tick(self) -> int:
+        """Update data once & dispatch to changed consumers
+
+        Returns:
+            Number of dispatched consumers.
+        """
+        self._mmap.update()
+        data = self._mmap.data
+        self._tracker.check(data)
+        version = self._section_version
+        last = self._section_last
+        for name, key_func in self._section_keys.items():
+            key = key_func(data)
+            if last.get(name, _UNSET) != key:
+                last[name] = key
+                version[name] += 1
+
+        now_ns = perf_counter_ns()
+        dispatched = 0
+        captured = None  # snapshot captured on first threaded dispatch
+        for consumer in self._consumers:
+            seen = tuple(version[name] for name in consumer.sections)
+            if seen == consumer.seen or now_ns - consumer.last_ns < consumer.interval:
+                continue
+            if consumer.threaded:
+                if consumer.pending is not None and not consumer.pending.done():
+                    continue
+                if captured is None:
+                    captured = self._capture(data)
+                snapshot = self._snapshots.acquire() if captured else None
+                if snapshot is None:  # pool exhausted, retry next tick
+                    continue
+                consumer.pending = self._submit(consumer.callback, snapshot)
+            else:
+                try:
+                    consumer.callback(data)
+                except Exception:  # keep other consumers running
+                    logger.exception("scheduler: consumer error: %s", consumer.callback)
+            consumer.seen = seen
+            consumer.last_ns = now_ns
+            dispatched += 1
+        return dispatched
+
+    def run(self, rate: float, stop: threading.Event) -> None:
+        """Tick at fixed rate until stop is set
+
+        Args:
+            rate: tick rate (Hz), 0 = as fast as possible.
+            stop: event to stop loop.
+        """
+        interval = int(1e9 / rate) if rate > 0 else 0
+        next_ns = perf_counter_ns()
+        # Wait until next deadline, tick time is not added to interval
+        while not stop.wait(max(next_ns - perf_counter_ns(), 0) / 1e9):
+            self.tick()
+            next_ns += interval
+            now_ns = perf_counter_ns()
+            if now_ns - next_ns > interval:  # fell behind, skip missed ticks
+                next_ns = now_ns
+
+    @property
+    def frame(self) -> FrameInfo:
+        """Frame info of latest tick (sequence, detection timestamp)"""
+        return self._tracker.frame
+
+    def close(self) -> None:
+        """Shutdown thread pool, wait for running consumers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _capture(self, data: ctypes.Structure) -> bool:
+        """Capture data snapshot for threaded consumers
+
+        Returns:
+            True if captured.
+        """
+        if self._snapshots is None:
+            # Each threaded consumer holds one lease (two while done callback is pending),
+            # plus latest & capturing slot
+            threaded = sum(consumer.threaded for consumer in self._consumers)
+            self._snapshots = SnapshotPool(type(data), threaded * 2 + 2)
+        return self._snapshots.capture(data, self._tracker.frame) is not None
+
+    def _submit(self, callback: Callable, snapshot: Snapshot) -> Future:
+        """Submit callback with leased snapshot to thread pool, release when done"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="lmu_scheduler")
+        try:
+            future = self._executor.submit(callback, snapshot.data)
+        except BaseException:
+            snapshot.release()
+            raise
+        future.add_done_callback(lambda done: (snapshot.release(), _log_error(done)))
+        return future
+
+
+def _log_error(future: Future) -> None:
+    """Log threaded consumer error"""
+    error = future.exception()
+    if error is not None:
+        logger.error("scheduler: threaded consumer error: %s", error)
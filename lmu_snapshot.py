@@ -0,0 +1,331 @@
+"""
+LMU Snapshot Pool
+
+Preallocated pool of data frame snapshots for cross-thread & cross-process consumers
+"""
+
+from __future__ import annotations
+
+import ctypes
+import threading
+from concurrent.futures import Executor, Future
+from multiprocessing import shared_memory
+from typing import Callable, NamedTuple
+
+try:
+    from .lmu_mmap import logger
+    from .lmu_trace import FrameInfo
+except ImportError:  # standalone, not package
+    from lmu_mmap import logger
+    from lmu_trace import FrameInfo
+
+
+class Snapshot:
+    """Leased data frame snapshot
+
+    Snapshot data is not overwritten while leased, must be treated as read-only.
+    Call release() (or use as context manager) when done.
+    """
+
+    __slots__ = (
+        "data",
+        "frame",
+        "index",
+        "refs",
+        "_pool",
+    )
+
+    def __init__(self, pool: SnapshotPool, index: int, data: ctypes.Structure) -> None:
+        self.data = data
+        self.frame = FrameInfo()
+        self.index = index
+        self.refs = 0
+        self._pool = pool
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """Release lease"""
+        self._pool.release(self)
+
+
+class SnapshotPool:
+    """Snapshot pool
+
+    Captured frames are copied into free preallocated slots,
+    slots are reused once all leases released.
+    Pool size should be at least number of concurrent readers + 2.
+    """
+
+    __slots__ = (
+        "_struct",
+        "_size",
+        "_slab",
+        "_slots",
+        "_free",
+        "_latest",
+        "_lock",
+        "dropped",
+    )
+
+    def __init__(self, data_struct: type, size: int = 4, slab=None) -> None:
+        """Initialize snapshot pool
+
+        Args:
+            data_struct: ctypes data structure, ex. lmu_data.LMUObjectOut.
+            size: number of snapshot slots.
+            slab: optional writable buffer of at least size * sizeof(data_struct) bytes,
+                default allocates bytearray.
+        """
+        if size < 2:
+            raise ValueError("pool size must be at least 2")
+        struct_size = ctypes.sizeof(data_struct)
+        if slab is None:
+            slab = bytearray(struct_size * size)
+        self._struct = data_struct
+        self._size = struct_size
+        self._slab = slab
+        self._slots = [
+            Snapshot(self, index, data_struct.from_buffer(slab, index * struct_size))
+            for index in range(size)
+        ]
+        self._free = list(reversed(self._slots))
+        self._latest: Snapshot | None = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def capture(
+        self, source: ctypes.Structure, frame: FrameInfo | None = None
+    ) -> Snapshot | None:
+        """Copy source data into free slot & publish as latest snapshot
+
+        Args:
+            source: data to copy, ex. MMapControl.data.
+            frame: optional frame info to attach, ex. MMapManager.frame,
+                snapshot frame is reset (sequence 0) if None.
+
+        Returns:
+            Published snapshot (not leased), or None if all slots leased.
+        """
+        if type(source) is not self._struct:
+            raise TypeError(
+                f"source must be {self._struct.__name__}, not {type(source).__name__}")
+        with self._lock:
+            if not self._free:
+                self.dropped += 1
+                if self.dropped == 1:
+                    logger.warning("snapshot: pool exhausted, frame dropped")
+                return None
+            snapshot = self._free.pop()
+            snapshot.refs = 1  # held by pool as latest
+        ctypes.memmove(ctypes.addressof(snapshot.data), ctypes.addressof(source), self._size)
+        if frame is not None:
+            snapshot.frame.copy_from(frame)
+        else:
+            snapshot.frame.reset()
+        with self._lock:
+            previous = self._latest
+            self._latest = snapshot
+            if previous is not None:
+                self._unref(previous)
+        return snapshot
+
+    def acquire(self) -> Snapshot | None:
+        """Lease latest snapshot, None if nothing captured yet"""
+        with self._lock:
+            snapshot = self._latest
+            if snapshot is not None:
+                snapshot.refs += 1
+            return snapshot
+
+    def release(self, snapshot: Snapshot) -> None:
+        """Release snapshot lease"""
+        with self._lock:
+            self._unref(snapshot)
+
+    def clear(self) -> None:
+        """Unpublish latest snapshot"""
+        with self._lock:
+            if self._latest is not None:
+                self._unref(self._latest)
+                self._latest = None
+
+    @property
+    def free(self) -> int:
+        """Number of free slots"""
+        return len(self._free)
+
+    def _unref(self, snapshot: Snapshot) -> None:
+        """Decrease snapshot reference count, lock must be held"""
+        if snapshot.refs <= 0:
+            raise RuntimeError("snapshot released more than leased")
+        snapshot.refs -= 1
+        if not snapshot.refs:
+            self._free.append(snapshot)
+
+
+class SnapshotHandle(NamedTuple):
+    """Picklable reference to snapshot in shared memory slab"""
+
+    name: str  # shared memory name
+    offset: int  # byte offset of snapshot in slab
+    index: int  # slot index
+
+
+class SharedSnapshotPool(SnapshotPool):
+    """Snapshot pool in shared memory slab
+
+    Snapshots are handed to worker processes as SnapshotHandle,
+    workers rebuild data view with attach_snapshot() without copying.
+    """
+
+    __slots__ = (
+        "_shm",
+        "_closed",
+    )
+
+    def __init__(self, data_struct: type, size: int = 8) -> None:
+        """Initialize shared snapshot pool
+
+        Args:
+            data_struct: ctypes data structure, ex. lmu_data.LMUObjectOut.
+            size: number of snapshot slots, at least number of in-flight tasks + 2.
+        """
+        if size < 2:
+            raise ValueError("pool size must be at least 2")
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=ctypes.sizeof(data_struct) * size)
+        try:
+            super().__init__(data_struct, size, self._shm.buf)
+        except BaseException:
+            self._slots = []  # drop any view before close
+            self._slab = None
+            self._shm.close()
+            self._shm.unlink()
+            raise
+        self._lock = threading.Condition(threading.RLock())  # notified on release, see close()
+        self._closed = False
+
+    def handle(self, snapshot: Snapshot) -> SnapshotHandle:
+        """Get picklable handle of snapshot"""
+        return SnapshotHandle(self._shm.name, snapshot.index * self._size, snapshot.index)
+
+    def submit(self, executor: Executor, func: Callable, *args) -> Future | None:
+        """Submit task with latest snapshot to executor
+
+        Snapshot is leased until task is done (acknowledged), then slot is recycled.
+
+        Args:
+            executor: process pool executor.
+            func: picklable function, called as func(handle, *args).
+            args: extra arguments.
+
+        Returns:
+            Task future, or None if nothing captured yet.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("cannot submit to closed snapshot pool")
+            snapshot = self.acquire()
+        if snapshot is None:
+            return None
+        try:
+            future = executor.submit(func, self.handle(snapshot), *args)
+        except BaseException:
+            snapshot.release()
+            raise
+        future.add_done_callback(lambda _: snapshot.release())
+        return future
+
+    def close(self, timeout: float | None = None) -> bool:
+        """Wait for outstanding leases, release snapshot views, close & unlink shared memory
+
+        New submit() is refused once closing. Shared memory is always unlinked,
+        even if views are still referenced (then closed when last view is deleted).
+
+        Args:
+            timeout: max time to wait for leased snapshots (seconds), None = no limit.
+
+        Returns:
+            True if all leases were released before unlink.
+        """
+        with self._lock:
+            self._closed = True
+            if self._latest is not None:
+                self._unref(self._latest)
+                self._latest = None
+            idle = self._lock.wait_for(self._idle, timeout)
+            if not idle:
+                logger.warning("snapshot: closing shared memory with leased snapshots")
+            self._free.clear()
+            for snapshot in self._slots:
+                snapshot.data = None
+            self._slots.clear()
+            self._slab = None
+            try:
+                self._shm.close()
+            except BufferError as error:
+                logger.error("snapshot: error while closing shared memory: %s", error)
+            try:
+                self._shm.unlink()
+            except FileNotFoundError as error:
+                logger.error("snapshot: error while unlinking shared memory: %s", error)
+        return idle
+
+    def capture(
+        self, source: ctypes.Structure, frame: FrameInfo | None = None
+    ) -> Snapshot | None:
+        """Copy source data into free slot & publish as latest snapshot, see SnapshotPool
+
+        Lock is held during copy, so close() cannot unmap slab while copying.
+
+        Raises:
+            RuntimeError: pool is closed.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("cannot capture to closed snapshot pool")
+            return super().capture(source, frame)
+
+    def acquire(self) -> Snapshot | None:
+        """Lease latest snapshot, None if nothing captured yet or closed"""
+        with self._lock:
+            if self._closed:
+                return None
+            return super().acquire()
+
+    def _idle(self) -> bool:
+        """Check if no snapshot is leased, lock must be held"""
+        return not any(snapshot.refs for snapshot in self._slots)
+
+    def _unref(self, snapshot: Snapshot) -> None:
+        """Decrease snapshot reference count & notify close(), lock must be held"""
+        super()._unref(snapshot)
+        self._lock.notify_all()
+
+
+# Shared memory attached by worker process
+_attached: dict[str, shared_memory.SharedMemory] = {}
+
+
+def attach_snapshot(handle: SnapshotHandle, data_struct: type) -> ctypes.Structure:
+    """Get snapshot data view from handle (worker process side)
+
+    Shared memory stays attached for lifetime of worker process.
+    Snapshot is only valid until task returns.
+
+    Args:
+        handle: snapshot handle from SharedSnapshotPool.
+        data_struct: ctypes data structure, ex. lmu_data.LMUObjectOut.
+
+    Returns:
+        Data view over shared memory.
+    """
+    shm = _attached.get(handle.name)
+    if shm is None:
+        shm = _attached[handle.name] = shared_memory.SharedMemory(handle.name)
+    return data_struct.from_buffer(shm.buf, handle.offset)
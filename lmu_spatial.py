@@ -0,0 +1,311 @@
+"""
+LMU Spatial Index
+
+Uniform grid hash of vehicle world position for proximity queries
+"""
+
+from __future__ import annotations
+
+import ctypes
+from itertools import repeat
+from math import ceil, dist, floor, isfinite, sqrt
+from typing import Iterable, Iterator
+
+try:
+    from . import lmu_data
+    from .lmu_array import field_info, read_strided
+except ImportError:  # standalone, not package
+    import lmu_data
+    from lmu_array import field_info, read_strided
+
+MAX_VEHICLES = lmu_data.LMUConstants.MAX_MAPPED_VEHICLES
+# Neighbour cell offsets on one side, each adjacent cell pair visited once
+HALF_NEIGHBOURS = ((1, -1), (1, 0), (1, 1), (0, 1))
+TELEM_POS_OFFSET = field_info(lmu_data.LMUObjectOut, ("telemetry", "telemInfo", "mPos"))[0]
+TELEM_STRIDE = ctypes.sizeof(lmu_data.LMUVehicleTelemetry)
+SCOR_POS_OFFSET = field_info(lmu_data.LMUObjectOut, ("scoring", "vehScoringInfo", "mPos"))[0]
+SCOR_STRIDE = ctypes.sizeof(lmu_data.LMUVehicleScoring)
+
+
+def read_positions(buffer, count: int, scoring: bool = False) -> tuple[float, ...]:
+    """Read world position of vehicles from LMUObjectOut buffer
+
+    Args:
+        buffer: LMUObjectOut data (ctypes structure, bytearray, mmap).
+        count: number of vehicles, ex. telemetry.activeVehicles.
+        scoring: read from vehScoringInfo instead of telemInfo.
+
+    Returns:
+        Flat tuple of x, y, z position per vehicle.
+    """
+    count = min(max(count, 0), MAX_VEHICLES)
+    if scoring:
+        return read_strided(buffer, SCOR_POS_OFFSET, "3d", count, SCOR_STRIDE)
+    return read_strided(buffer, TELEM_POS_OFFSET, "3d", count, TELEM_STRIDE)
+
+
+class SpatialGrid:
+    """Uniform grid hash of vehicle position
+
+    Vehicles are hashed on horizontal x-z plane,
+    distance is measured in 3D world space (meters).
+    Vehicles with non finite position (NaN, Inf) are left out of grid,
+    have no neighbours & are not found by queries.
+    """
+
+    __slots__ = (
+        "_cell_size",
+        "_cells",
+        "_keys",
+        "_points",
+        "_valid",
+        "count",
+    )
+
+    def __init__(self, cell_size: float = 50.0) -> None:
+        """Initialize spatial grid
+
+        Args:
+            cell_size: grid cell size in meters, ideally close to typical query radius.
+        """
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self._cell_size = cell_size
+        self._cells = {}
+        self._keys = []
+        self._points = []
+        self._valid = []
+        self.count = 0
+
+    def rebuild(self, positions: tuple[float, ...]) -> None:
+        """Rebuild grid from flat x, y, z position sequence
+
+        Args:
+            positions: flat x, y, z position per vehicle, see read_positions().
+        """
+        points = list(zip(positions[0::3], positions[1::3], positions[2::3]))
+        self._keys, self._cells = _hash_cells(points, self._cell_size)
+        self._valid = [index for index, key in enumerate(self._keys) if key is not None]
+        self._points = points
+        self.count = len(points)
+
+    def update(self, data, count: int | None = None, scoring: bool = False) -> None:
+        """Rebuild grid from LMUObjectOut data
+
+        Args:
+            data: LMUObjectOut data, ex. MMapControl.data.
+            count: number of vehicles, default reads from data.
+            scoring: use scoring position instead of telemetry position.
+        """
+        if count is None:
+            if scoring:
+                count = data.scoring.scoringInfo.mNumVehicles
+            else:
+                count = data.telemetry.activeVehicles
+        self.rebuild(read_positions(data, count, scoring))
+
+    def _measure(self, index: int, others: Iterable[int]) -> list[tuple[int, float]]:
+        """Measure distance from vehicle to other vehicles"""
+        points = self._points
+        origin = points[index]
+        return [(other, dist(origin, points[other])) for other in others if other != index]
+
+    def _gather(self, cx: int, cz: int, inner: int, outer: int) -> list[int]:
+        """Gather vehicle index from cells between inner & outer ring (inclusive)"""
+        return _gather_cells(self._cells, cx, cz, inner, outer)
+
+    def within(self, index: int, radius: float) -> list[tuple[int, float]]:
+        """Find vehicles within radius of vehicle
+
+        Args:
+            index: vehicle index.
+            radius: search radius in meters.
+
+        Returns:
+            List of (vehicle index, distance), sorted by distance, excluding self.
+        """
+        if not 0 <= index < self.count or self._keys[index] is None:
+            return []
+        cx, cz = self._keys[index]
+        reach = ceil(radius / self._cell_size)
+        found = [
+            item for item in self._measure(index, self._gather(cx, cz, 0, reach))
+            if item[1] <= radius
+        ]
+        found.sort(key=_by_distance)
+        return found
+
+    def within_all(self, radius: float) -> list[list[tuple[int, float]]]:
+        """Find vehicles within radius of each vehicle
+
+        Args:
+            radius: search radius in meters.
+
+        Returns:
+            List (per vehicle index) of (vehicle index, distance) list, sorted by distance.
+        """
+        points = self._points
+        result = [[] for _ in range(self.count)]
+        if radius > self._cell_size:  # batch grid with cell size of radius
+            cells = _hash_cells(points, radius)[1]
+        else:
+            cells = self._cells
+        # Single pass over each occupied cell & its neighbours, each vehicle pair measured once
+        for cell, other in _cell_pairs(cells):
+            other_points = [points[other_index] for other_index in other]
+            for position, index in enumerate(cell):
+                origin = points[index]
+                found = result[index]
+                start = position + 1 if cell is other else 0
+                for other_index, distance in zip(
+                    other[start:], map(dist, repeat(origin), other_points[start:])
+                ):
+                    if distance <= radius:
+                        found.append((other_index, distance))
+                        result[other_index].append((index, distance))
+        for found in result:
+            found.sort(key=_by_distance)
+        return result
+
+    def nearest(self, index: int, k: int) -> list[tuple[int, float]]:
+        """Find k nearest vehicles of vehicle
+
+        Args:
+            index: vehicle index.
+            k: max number of vehicles.
+
+        Returns:
+            List of (vehicle index, distance), sorted by distance, excluding self.
+        """
+        if not 0 <= index < self.count or k < 1 or self._keys[index] is None:
+            return []
+        cells = self._cells
+        size = self._cell_size
+        cx, cz = self._keys[index]
+        found = []
+        inner = 0
+        outer = 0
+        # Double search ring until k found & no closer vehicle can exist outside ring
+        while True:
+            if (2 * outer + 1) ** 2 > len(cells):  # sparse grid, measure all
+                found = self._measure(index, self._valid)
+                break
+            found.extend(self._measure(index, self._gather(cx, cz, inner, outer)))
+            if len(found) >= k:
+                found.sort(key=_by_distance)
+                if found[k - 1][1] <= outer * size:
+                    break
+            inner = outer + 1
+            outer = outer * 2 + 1
+        found.sort(key=_by_distance)
+        del found[k:]
+        return found
+
+    def nearest_all(self, k: int) -> list[list[tuple[int, float]]]:
+        """Find k nearest vehicles of each vehicle
+
+        Args:
+            k: max number of vehicles.
+
+        Returns:
+            List (per vehicle index) of (vehicle index, distance) list, sorted by distance.
+        """
+        result = [[] for _ in range(self.count)]
+        valid = self._valid
+        count = len(valid)
+        if k < 1 or count < 2:
+            return result
+        k = min(k, count - 1)
+        points = self._points
+        # Batch grid sized for about k + 1 vehicles per cell, shared by vehicles of each cell
+        xs = [points[index][0] for index in valid]
+        zs = [points[index][2] for index in valid]
+        area = (max(xs) - min(xs)) * (max(zs) - min(zs))
+        size = max(sqrt(area * (k + 1) / count), self._cell_size)
+        cells = _hash_cells(points, size)[1]
+        for (cx, cz), cell in cells.items():
+            pending = cell
+            candidates = _gather_cells(cells, cx, cz, 0, 1)
+            ring = 1
+            # Expand ring until no closer vehicle can exist outside ring for all pending
+            while pending:
+                unresolved = []
+                bound = ring * size
+                candidate_points = [points[other] for other in candidates]
+                for index in pending:
+                    found = sorted(zip(
+                        map(dist, repeat(points[index]), candidate_points), candidates))
+                    found.remove((0.0, index))  # self
+                    if len(found) >= k and (found[k - 1][0] <= bound or len(candidates) == count):
+                        result[index] = [(other, distance) for distance, other in found[:k]]
+                    else:
+                        unresolved.append(index)
+                pending = unresolved
+                if pending:
+                    outer = ring * 2
+                    candidates.extend(_gather_cells(cells, cx, cz, ring + 1, outer))
+                    ring = outer
+        return result
+
+
+def _hash_cells(
+    points: list[tuple[float, float, float]], size: float
+) -> tuple[list[tuple[int, int]], dict[tuple[int, int], list[int]]]:
+    """Hash points on x-z plane into cells
+
+    Returns:
+        Cell key per point (None for non finite point), cell key: point index list.
+    """
+    keys = [
+        (floor(x / size), floor(z / size)) if isfinite(x + y + z) else None  # NaN, Inf propagate
+        for x, y, z in points
+    ]
+    cells = {}
+    for index, key in enumerate(keys):
+        if key is None:
+            continue
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [index]
+        else:
+            cell.append(index)
+    return keys, cells
+
+
+def _cell_pairs(cells: dict) -> Iterator[tuple[list[int], list[int]]]:
+    """Occupied cell & adjacent cell pairs, each unordered pair once"""
+    get = cells.get
+    for (cx, cz), cell in cells.items():
+        yield cell, cell
+        for dx, dz in HALF_NEIGHBOURS:
+            other = get((cx + dx, cz + dz))
+            if other is not None:
+                yield cell, other
+
+
+def _gather_cells(cells: dict, cx: int, cz: int, inner: int, outer: int) -> list[int]:
+    """Gather vehicle index from cells between inner & outer ring (inclusive)"""
+    others = []
+    if (2 * outer + 1) ** 2 > len(cells):  # sparse grid, scan occupied cells
+        for (kx, kz), cell in cells.items():
+            if inner <= max(abs(kx - cx), abs(kz - cz)) <= outer:
+                others.extend(cell)
+        return others
+    for ring in range(inner, outer + 1):
+        if ring:
+            keys = [(cx + offset, cz - ring) for offset in range(-ring, ring + 1)]
+            keys.extend((cx + offset, cz + ring) for offset in range(-ring, ring + 1))
+            keys.extend((cx - ring, cz + offset) for offset in range(1 - ring, ring))
+            keys.extend((cx + ring, cz + offset) for offset in range(1 - ring, ring))
+        else:
+            keys = ((cx, cz),)
+        for key in keys:
+            cell = cells.get(key)
+            if cell is not None:
+                others.extend(cell)
+    return others
+
+
+def _by_distance(item: tuple[int, float]) -> float:
+    """Sort key"""
+    return item[1]
@@ -0,0 +1,209 @@
+"""
+LMU Memory Map Statistics
+
+Optional instrumentation of MMapControl update path
+"""
+
+from __future__ import annotations
+
+import json
+from bisect import bisect_left
+from time import perf_counter_ns
+
+# Update latency histogram bucket upper bounds (microseconds)
+LATENCY_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+RATE_SMOOTHING = 0.1  # exponential moving average factor for update interval
+
+
+class MMapStats:
+    """Memory map update statistics
+
+    Pass to MMapControl (or assign MMapControl.stats) before calling create() to enable.
+    """
+
+    __slots__ = (
+        "updates",
+        "bytes_copied",
+        "rejected",
+        "retries",
+        "latency_buckets",
+        "latency_sum",
+        "latency_max",
+        "telemetry_frames",
+        "scoring_frames",
+        "_last_rejected",
+        "_telemetry_et",
+        "_scoring_et",
+        "_telemetry_ns",
+        "_scoring_ns",
+        "_telemetry_interval",
+        "_scoring_interval",
+        "_fresh_ns",
+    )
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all statistics"""
+        self.updates = 0
+        self.bytes_copied = 0
+        self.rejected = 0
+        self.retries = 0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.telemetry_frames = 0
+        self.scoring_frames = 0
+        self._last_rejected = False
+        self._telemetry_et = None
+        self._scoring_et = None
+        self._telemetry_ns = 0
+        self._scoring_ns = 0
+        self._telemetry_interval = 0.0
+        self._scoring_interval = 0.0
+        self._fresh_ns = 0
+
+    def record(
+        self,
+        start_ns: int,
+        copied: int,
+        accepted: bool,
+        telemetry_et: float,
+        scoring_et: float,
+    ) -> None:
+        """Record single update
+
+        Args:
+            start_ns: update start time from perf_counter_ns().
+            copied: number of bytes copied.
+            accepted: whether update passed copy guard.
+            telemetry_et: player telemetry elapsed time.
+            scoring_et: scoring current time.
+        """
+        now_ns = perf_counter_ns()
+        latency = (now_ns - start_ns) / 1000
+        self.updates += 1
+        self.latency_sum += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+        if self._last_rejected:
+            self.retries += 1
+        self._last_rejected = not accepted
+        if not accepted:
+            self.rejected += 1
+            return
+        self.bytes_copied += copied
+
+        if telemetry_et != self._telemetry_et:
+            if self._telemetry_et is not None:
+                self.telemetry_frames += 1
+                self._telemetry_interval = _smooth(
+                    self._telemetry_interval, now_ns - self._telemetry_ns)
+            self._telemetry_et = telemetry_et
+            self._telemetry_ns = now_ns
+            self._fresh_ns = now_ns
+        if scoring_et != self._scoring_et:
+            if self._scoring_et is not None:
+                self.scoring_frames += 1
+                self._scoring_interval = _smooth(
+                    self._scoring_interval, now_ns - self._scoring_ns)
+            self._scoring_et = scoring_et
+            self._scoring_ns = now_ns
+            self._fresh_ns = now_ns
+
+    @property
+    def telemetry_rate(self) -> float:
+        """Observed telemetry update rate (Hz)"""
+        return 1e9 / self._telemetry_interval if self._telemetry_interval else 0.0
+
+    @property
+    def scoring_rate(self) -> float:
+        """Observed scoring update rate (Hz)"""
+        return 1e9 / self._scoring_interval if self._scoring_interval else 0.0
+
+    @property
+    def age(self) -> float:
+        """Time since last fresh frame (seconds), -1 if no fresh frame yet"""
+        if not self._fresh_ns:
+            return -1.0
+        return (perf_counter_ns() - self._fresh_ns) / 1e9
+
+    @property
+    def latency_mean(self) -> float:
+        """Mean update latency (microseconds)"""
+        return self.latency_sum / self.updates if self.updates else 0.0
+
+    def to_dict(self) -> dict:
+        """Export statistics as dict"""
+        return {
+            "updates": self.updates,
+            "bytes_copied": self.bytes_copied,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "latency_us": {
+                "mean": self.latency_mean,
+                "max": self.latency_max,
+                "buckets": dict(zip(
+                    [*map(str, LATENCY_BUCKETS), "+Inf"], self.latency_buckets)),
+            },
+            "telemetry_frames": self.telemetry_frames,
+            "scoring_frames": self.scoring_frames,
+            "telemetry_rate": self.telemetry_rate,
+            "scoring_rate": self.scoring_rate,
+            "age": self.age,
+        }
+
+    def to_json(self) -> str:
+        """Export statistics as JSON text"""
+        return json.dumps(self.to_dict())
+
+    def to_prometheus(self, name: str = "lmu_mmap", labels: str = "") -> str:
+        """Export statistics as Prometheus text exposition format
+
+        Args:
+            name: metric name prefix.
+            labels: extra labels without braces, ex. 'mmap="LMU_Data"'.
+        """
+        sep = "," if labels else ""
+        tag = f"{{{labels}}}" if labels else ""
+        lines = [
+            f"# TYPE {name}_updates_total counter",
+            f"{name}_updates_total{tag} {self.updates}",
+            f"# TYPE {name}_bytes_copied_total counter",
+            f"{name}_bytes_copied_total{tag} {self.bytes_copied}",
+            f"# TYPE {name}_rejected_total counter",
+            f"{name}_rejected_total{tag} {self.rejected}",
+            f"# TYPE {name}_retries_total counter",
+            f"{name}_retries_total{tag} {self.retries}",
+            f"# TYPE {name}_update_latency_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip([*LATENCY_BUCKETS, None], self.latency_buckets):
+            cumulative += count
+            le = "+Inf" if bound is None else f"{bound / 1e6:g}"
+            lines.append(f'{name}_update_latency_seconds_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+        lines.extend((
+            f"{name}_update_latency_seconds_sum{tag} {self.latency_sum / 1e6:g}",
+            f"{name}_update_latency_seconds_count{tag} {self.updates}",
+            f"# TYPE {name}_telemetry_frames_total counter",
+            f"{name}_telemetry_frames_total{tag} {self.telemetry_frames}",
+            f"# TYPE {name}_scoring_frames_total counter",
+            f"{name}_scoring_frames_total{tag} {self.scoring_frames}",
+            f"# TYPE {name}_telemetry_rate_hertz gauge",
+            f"{name}_telemetry_rate_hertz{tag} {self.telemetry_rate:g}",
+            f"# TYPE {name}_scoring_rate_hertz gauge",
+            f"{name}_scoring_rate_hertz{tag} {self.scoring_rate:g}",
+            f"# TYPE {name}_age_seconds gauge",
+            f"{name}_age_seconds{tag} {self.age:g}",
+        ))
+        return "\n".join(lines) + "\n"
+
+
+def _smooth(average: float, sample: float) -> float:
+    """Exponential moving average"""
+    if not average:
+        return sample
+    return average + (sample - average) * RATE_SMOOTHING
@@ -0,0 +1,190 @@
+"""
+LMU Latency Trace
+
+Fresh frame detection timestamp & per consumer latency distribution
+"""
+
+from __future__ import annotations
+
+import ctypes
+from array import array
+from time import perf_counter_ns
+
+try:
+    from . import lmu_data
+except ImportError:  # standalone, not package
+    import lmu_data
+
+MAX_VEHICLES = lmu_data.LMUConstants.MAX_MAPPED_VEHICLES
+
+
+class FrameInfo:
+    """Fresh frame metadata"""
+
+    __slots__ = (
+        "sequence",
+        "detected_ns",
+        "elapsed_time",
+        "delta_time",
+        "current_et",
+    )
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def __repr__(self) -> str:
+        return (
+            f"FrameInfo(sequence={self.sequence}, detected_ns={self.detected_ns}, "
+            f"elapsed_time={self.elapsed_time}, delta_time={self.delta_time}, "
+            f"current_et={self.current_et})"
+        )
+
+    def reset(self) -> None:
+        """Reset to no frame (sequence 0)"""
+        self.sequence = 0  # fresh frame counter, 0 = no frame info
+        self.detected_ns = 0  # perf_counter_ns() when fresh frame detected
+        self.elapsed_time = 0.0  # player telemetry mElapsedTime
+        self.delta_time = 0.0  # player telemetry mDeltaTime
+        self.current_et = 0.0  # scoring mCurrentET
+
+    def copy_from(self, other: FrameInfo) -> None:
+        """Copy metadata from other frame info"""
+        self.sequence = other.sequence
+        self.detected_ns = other.detected_ns
+        self.elapsed_time = other.elapsed_time
+        self.delta_time = other.delta_time
+        self.current_et = other.current_et
+
+    @property
+    def age(self) -> float:
+        """Time since fresh frame detected (seconds)"""
+        return (perf_counter_ns() - self.detected_ns) / 1e9
+
+
+class FrameTracker:
+    """Detect fresh frame from game time & record detection timestamp"""
+
+    __slots__ = ("frame",)
+
+    def __init__(self) -> None:
+        self.frame = FrameInfo()
+
+    def check(self, data: ctypes.Structure) -> bool:
+        """Check data for fresh frame, call after each update
+
+        Args:
+            data: LMUObjectOut data, ex. MMapControl.data.
+
+        Returns:
+            True if fresh frame detected.
+        """
+        telemetry = data.telemetry
+        vehicle = telemetry.telemInfo[min(telemetry.playerVehicleIdx, MAX_VEHICLES - 1)]
+        elapsed_time = vehicle.mElapsedTime
+        current_et = data.scoring.scoringInfo.mCurrentET
+        frame = self.frame
+        if elapsed_time == frame.elapsed_time and current_et == frame.current_et:
+            return False
+        frame.detected_ns = perf_counter_ns()
+        frame.sequence += 1
+        frame.elapsed_time = elapsed_time
+        frame.delta_time = vehicle.mDeltaTime
+        frame.current_et = current_et
+        return True
+
+
+class ConsumerLatency:
+    """Latency samples of single consumer"""
+
+    __slots__ = (
+        "count",
+        "skipped",
+        "total",
+        "maximum",
+        "last_sequence",
+        "_samples",
+    )
+
+    def __init__(self, size: int) -> None:
+        self.count = 0
+        self.skipped = 0  # fresh frames never consumed
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last_sequence = 0
+        self._samples = array("d", bytes(8 * size))  # recent latency (microseconds)
+
+    def add(self, latency: float, sequence: int) -> None:
+        """Add latency sample (microseconds), repeated consumption of same frame is ignored"""
+        if sequence == self.last_sequence:
+            return
+        samples = self._samples
+        samples[self.count % len(samples)] = latency
+        self.count += 1
+        self.total += latency
+        if latency > self.maximum:
+            self.maximum = latency
+        if self.last_sequence and sequence > self.last_sequence + 1:
+            self.skipped += sequence - self.last_sequence - 1
+        self.last_sequence = sequence
+
+    def summary(self) -> dict[str, float]:
+        """Latency distribution summary (microseconds), percentiles of recent samples"""
+        recent = sorted(self._samples[:min(self.count, len(self._samples))])
+        if not recent:
+            return {"count": 0, "skipped": 0}
+        last = len(recent) - 1
+        return {
+            "count": self.count,
+            "skipped": self.skipped,
+            "mean": self.total / self.count,
+            "p50": recent[last // 2],
+            "p90": recent[last * 9 // 10],
+            "p99": recent[last * 99 // 100],
+            "max": self.maximum,
+        }
+
+
+class LatencyTracer:
+    """Latency from fresh frame detection to consumption, per consumer"""
+
+    __slots__ = (
+        "_consumers",
+        "_size",
+    )
+
+    def __init__(self, size: int = 1024) -> None:
+        """Initialize tracer
+
+        Args:
+            size: number of recent samples kept per consumer for percentiles.
+        """
+        self._consumers: dict[str, ConsumerLatency] = {}
+        self._size = size
+
+    def record(self, consumer: str, frame: FrameInfo) -> float:
+        """Record consumption of frame
+
+        Args:
+            consumer: consumer name.
+            frame: consumed frame info, ex. Snapshot.frame.
+
+        Returns:
+            Latency (microseconds), only first consumption of each frame is recorded,
+            frame without info (sequence 0) is not recorded & returns 0.
+        """
+        if not frame.sequence:
+            return 0.0
+        latency = (perf_counter_ns() - frame.detected_ns) / 1000
+        stats = self._consumers.get(consumer)
+        if stats is None:
+            stats = self._consumers.setdefault(consumer, ConsumerLatency(self._size))
+        stats.add(latency, frame.sequence)
+        return latency
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """Latency summary of each consumer, see ConsumerLatency.summary()"""
+        return {name: stats.summary() for name, stats in self._consumers.items()}
+
+    def reset(self) -> None:
+        """Remove all consumer samples"""
+        self._consumers.clear()
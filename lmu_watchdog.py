@@ -0,0 +1,178 @@
+"""
+LMU Watchdog
+
+Per frame data quality flags of all active vehicles
+"""
+
+from __future__ import annotations
+
+from array import array
+from math import isfinite
+
+try:
+    from .lmu_query import Query
+except ImportError:  # standalone, not package
+    from lmu_query import Query
+
+# Vehicle flags
+FLAG_FROZEN = 1  # mElapsedTime not advancing while other vehicles advance
+FLAG_NON_FINITE = 2  # NaN or Inf value
+FLAG_OUT_OF_RANGE = 4  # value outside limits
+FLAG_ID_MISMATCH = 8  # mID missing from other side (scoring/telemetry) or duplicated
+FLAG_BAD = FLAG_FROZEN | FLAG_NON_FINITE | FLAG_OUT_OF_RANGE | FLAG_ID_MISMATCH
+
+# Vehicle telemetry field: (low, high) limits, None = no limit
+CHECK_FIELDS = {
+    "mPos": (None, None),
+    "mLocalVel": (-200.0, 200.0),
+    "mLocalAccel": (None, None),
+    "mEngineRPM": (-1000.0, 50000.0),
+    "mFuel": (0.0, 1000.0),
+    "mWheels[*].mRotation": (None, None),
+    "mWheels[*].mTireLoad": (None, None),
+    "mWheels[*].mPressure": (0.0, 1000.0),
+    "mWheels[*].mTemperature": (0.0, 1000.0),
+    "mWheels[*].mWear": (0.0, 1.0),
+}
+
+
+class DataWatchdog:
+    """Data quality watchdog
+
+    Each check reads fields of all active vehicles as flat arrays,
+    whole array is tested first (sum/min/max), per vehicle rows are tested
+    only if whole array fails. Flags are indexed same as telemetry
+    (flags) & scoring (scoring_flags) vehicle arrays, zero = valid.
+    """
+
+    __slots__ = (
+        "frozen_frames",
+        "flags",
+        "scoring_flags",
+        "_elapsed",
+        "_stale",
+        "_ids",
+        "_last_time",
+        "_telem_id",
+        "_telem_time",
+        "_scor_id",
+        "_checks",
+    )
+
+    def __init__(
+        self,
+        fields: dict[str, tuple[float | None, float | None]] | None = None,
+        frozen_frames: int = 10,
+    ) -> None:
+        """Initialize watchdog
+
+        Args:
+            fields: vehicle telemetry field selector (relative to telemInfo): (low, high) limits,
+                default CHECK_FIELDS.
+            frozen_frames: number of frames without mElapsedTime change to flag frozen vehicle.
+        """
+        self.frozen_frames = frozen_frames
+        self.flags = array("B")
+        self.scoring_flags = array("B")
+        self._elapsed = array("d")
+        self._stale = array("I")
+        self._ids = array("i")
+        self._last_time = 0.0
+        self._telem_id = Query("telemetry.telemInfo[:activeVehicles].mID")
+        self._telem_time = Query("telemetry.telemInfo[:activeVehicles].mElapsedTime")
+        self._scor_id = Query("scoring.vehScoringInfo[:mNumVehicles].mID")
+        self._checks = tuple(
+            (Query(f"telemetry.telemInfo[:activeVehicles].{field}"), low, high)
+            for field, (low, high) in (CHECK_FIELDS if fields is None else fields).items()
+        )
+
+    def check(self, data) -> array:
+        """Check frame
+
+        Args:
+            data: LMUObjectOut data, ex. MMapControl.data or RecordReader frame.
+
+        Returns:
+            Flags of each telemetry vehicle.
+        """
+        ids = self._telem_id(data)
+        count = len(ids)
+        flags = self.flags = array("B", bytes(count))
+        self._check_frozen(ids, self._telem_time(data), flags)
+        self._check_ids(ids, self._scor_id(data), flags)
+        for query, low, high in self._checks:
+            values = query(data)
+            if count:
+                _check_values(values, len(values) // count, low, high, flags)
+        return flags
+
+    def valid(self) -> list[int]:
+        """Telemetry vehicle indexes without flags"""
+        return [index for index, flag in enumerate(self.flags) if not flag]
+
+    def mask(self, flag: int = FLAG_BAD) -> list[bool]:
+        """Telemetry vehicle mask, True if vehicle has none of flag bits"""
+        return [not value & flag for value in self.flags]
+
+    def _check_frozen(self, ids: array, elapsed: array, flags: array) -> None:
+        """Flag vehicles with mElapsedTime not advancing while latest time advanced
+
+        Stale counters only change when latest time advanced, flags are applied on every check.
+        """
+        latest = max(elapsed, default=0.0)
+        if self._ids != ids:  # vehicle slots changed, reset stale counter
+            previous = dict(zip(self._ids, zip(self._elapsed, self._stale)))
+            self._stale = array("I", (
+                previous[slot_id][1] if slot_id in previous and previous[slot_id][0] == time else 0
+                for slot_id, time in zip(ids, elapsed)
+            ))
+            self._elapsed = array("d", elapsed)
+            self._ids = ids
+        elif latest > self._last_time:
+            self._stale = array("I", (
+                count + 1 if time == last else 0
+                for time, last, count in zip(elapsed, self._elapsed, self._stale)
+            ))
+            self._elapsed = elapsed
+        self._last_time = latest
+        # Flag from stored counters on every check, stable between telemetry updates
+        stale = self._stale
+        limit = self.frozen_frames
+        if max(stale, default=0) >= limit:
+            for index, count in enumerate(stale):
+                if count >= limit:
+                    flags[index] |= FLAG_FROZEN
+
+    def _check_ids(self, telem_ids: array, scor_ids: array, flags: array) -> None:
+        """Flag vehicles with mID missing from other side or duplicated"""
+        telem_set = set(telem_ids)
+        scor_set = set(scor_ids)
+        self.scoring_flags = scoring_flags = array("B", bytes(len(scor_ids)))
+        if telem_set == scor_set and len(telem_set) == len(telem_ids) == len(scor_ids):
+            return
+        for ids, other, side_flags in (
+            (telem_ids, scor_set, flags), (scor_ids, telem_set, scoring_flags)
+        ):
+            seen = set()
+            for index, slot_id in enumerate(ids):
+                if slot_id not in other or slot_id in seen:
+                    side_flags[index] |= FLAG_ID_MISMATCH
+                seen.add(slot_id)
+
+
+def _check_values(
+    values: array, width: int, low: float | None, high: float | None, flags: array
+) -> None:
+    """Flag rows of width values with non finite or out of range value"""
+    if isfinite(sum(values)):  # NaN or Inf propagates through sum
+        bad = FLAG_OUT_OF_RANGE
+        if (low is None or min(values) >= low) and (high is None or max(values) <= high):
+            return
+    else:
+        bad = FLAG_NON_FINITE | FLAG_OUT_OF_RANGE
+    for index in range(len(flags)):
+        row = values[index * width:index * width + width]
+        if bad & FLAG_NON_FINITE and not isfinite(sum(row)):
+            flags[index] |= FLAG_NON_FINITE
+        elif (low is not None and min(row) < low) or (high is not None and max(row) > high):
+            flags[index] |= FLAG_OUT_OF_RANGE